@@ -3,17 +3,42 @@
 import asyncio
 import os
 import shutil
+import sys
 
-from agents import Agent, Runner, gen_trace_id, trace
+from agents import Agent, Runner, custom_span, function_tool, gen_trace_id, trace
 from agents.mcp import MCPServer, MCPServerStdio
 from dotenv import load_dotenv
 
+from policy_kb import PolicyKnowledgeBase
+
+# span_collector lives in the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from span_collector import install_local_tracing
+
 load_dotenv()
 
+# Spans go to a local ring buffer and traces/ instead of platform.openai.com
+span_processor = install_local_tracing()
+
+# Loads the prebuilt section index from data/ (rebuilt only when a policy file changes)
+policy_kb = PolicyKnowledgeBase()
+
+@function_tool
+def lookup_policy(question: str) -> str:
+    """Look up the ACME Airlines policy section (baggage allowances, fees, exceptions) that answers a question.
+
+    Args:
+        question: The passenger's question.
+    """
+    return policy_kb.lookup_text(question)
+
 async def run(mcp_server: MCPServer, message: str):
     agent = Agent(
         name="Assistant",
-        instructions="Use the tools to return flight info.",
+        instructions="Use the tools to return flight info. For baggage or other policy questions, "
+                     "call lookup_policy once and answer from the section it returns; if it finds no matching "
+                     "section, say the policies do not cover the question.",
+        tools=[lookup_policy],
         mcp_servers=[mcp_server],
     )
 
@@ -30,15 +55,20 @@ async def run_mcp(message: str):
     if not shutil.which("npx"):
         raise RuntimeError("npx is not installed. Please install it with `npm install -g npx`.")
 
-    async with MCPServerStdio(
+    server = MCPServerStdio(
         name="Flight Info Bot",
         params={
             "command": "npx",
             "args": ["/Users/billhorn/code/javascript/acme-air-demo", message],
             "cache_tools_list": "True"
         },
-    ) as server:
-        trace_id = gen_trace_id()
-        with trace(workflow_name="MCP Filesystem Example", trace_id=trace_id):
-            print(f"View trace: https://platform.openai.com/traces/{trace_id}\n")
+    )
+    trace_id = gen_trace_id()
+    with trace(workflow_name="MCP Filesystem Example", trace_id=trace_id):
+        print(f"Trace {trace_id} -> {span_processor.path}\n")
+        with custom_span("mcp_server_spawn"):
+            await server.connect()
+        try:
             return await run(server, message)
+        finally:
+            await server.cleanup()
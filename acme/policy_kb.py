@@ -0,0 +1,169 @@
+# policy_kb.py
+
+import glob
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+_SECTION_BREAK = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+_LABELED_PARAGRAPH = re.compile(r"^(Exceptions?|Tips?|Notes?)\s*:", re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "how", "i", "if", "in",
+    "is", "it", "many", "may", "me", "much", "my", "of", "on", "or", "per", "the", "to", "what", "with",
+    "you", "your", "acme", "airline", "airlines", "policy",
+}
+# Words that show up in questions about anything ("can I bring my dog?"); they add to a
+# section's score but a question matching only these has no policy answer
+_GENERIC = {
+    "allow", "allowed", "bring", "carry", "fly", "flight", "get", "have", "need", "passenger",
+    "take", "travel", "trip", "want",
+}
+# Different words people use for the same thing, mapped onto the words in the policies
+_SYNONYMS = {
+    "carryon": "carryon", "cabin": "carryon", "hand": "carryon", "overhead": "carryon",
+    "luggage": "baggage", "bag": "baggage", "suitcase": "baggage",
+    "check": "checked", "hold": "checked",
+    "overweight": "excess", "heavy": "excess", "oversized": "excess", "oversize": "excess", "large": "excess",
+    "fee": "cost", "price": "cost", "charge": "cost", "pay": "cost",
+    "exception": "exceptions", "status": "exceptions", "tier": "exceptions", "elite": "exceptions",
+    "skyclass": "exceptions", "goldwing": "exceptions",
+}
+_TITLE_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    text = re.sub(r"carry[\s-]*on", "carryon", text.lower())
+    terms = []
+    for token in _TOKEN.findall(text):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if token in _SYNONYMS and _SYNONYMS[token] != token:
+            terms.append(_SYNONYMS[token])
+    return terms
+
+
+def parse_sections(text: str) -> List[Tuple[str, Optional[int], str]]:
+    """Split a policy document into (title, parent index, text) sections.
+
+    Sections are separated by ----- lines; the first line is the title. Paragraphs
+    that start with "Exceptions:", "Tip:" or "Note:" also become child sections so
+    they can be returned on their own.
+    """
+    sections: List[Tuple[str, Optional[int], str]] = []
+    for block in _SECTION_BREAK.split(text):
+        block = block.strip()
+        if not block:
+            continue
+        lines = block.splitlines()
+        title = lines[0].strip().lstrip("*# ").rstrip(":").strip()
+        parent = len(sections)
+        sections.append((title, None, block))
+        for paragraph in re.split(r"\n\s*\n", "\n".join(lines[1:])):
+            paragraph = paragraph.strip()
+            label = _LABELED_PARAGRAPH.match(paragraph)
+            if label:
+                sections.append((f"{title} - {label.group(1).capitalize()}", parent, paragraph))
+    return sections
+
+
+class PolicyKnowledgeBase:
+    """Section-level keyword index over the policy documents in data/.
+
+    The index is built once and saved next to the documents as a small JSON file;
+    later runs load it directly unless a source file changed. `lookup()` returns only
+    the best matching section, so the model never has to read a whole document, and
+    nothing when the question only shares generic words with the policies or the
+    best score is below `min_score`.
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, index_path: Optional[str] = None, pattern: str = "*policy*.txt", min_score: float = 0.0):
+        self._data_dir = data_dir
+        self._min_score = min_score
+        self._index_path = index_path or os.path.join(data_dir, "policy_index.json")
+        self._pattern = pattern
+        self._index = self._load() or self._build()
+
+    def _sources(self) -> Dict[str, List[int]]:
+        sources = {}
+        for path in sorted(glob.glob(os.path.join(self._data_dir, self._pattern))):
+            st = os.stat(path)
+            sources[os.path.basename(path)] = [st.st_mtime_ns, st.st_size]
+        return sources
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION or index.get("sources") != self._sources():
+            return None
+        return index
+
+    def _build(self) -> dict:
+        sources = self._sources()
+        sections = []
+        for name in sources:
+            with open(os.path.join(self._data_dir, name), encoding="utf-8") as f:
+                text = f.read()
+            offset = len(sections)
+            for title, parent, body in parse_sections(text):
+                sections.append([name, title, -1 if parent is None else parent + offset, body])
+
+        # term -> {section: weighted term frequency}, then scaled by idf
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for i, (_, title, _, body) in enumerate(sections):
+            counts = Counter(tokenize(body))
+            for term in tokenize(title):
+                counts[term] += _TITLE_WEIGHT
+            for term, count in counts.items():
+                postings[term][i] = 1 + math.log(count)
+        total = len(sections)
+        index = {
+            "version": INDEX_VERSION,
+            "sources": sources,
+            "sections": sections,
+            "postings": {
+                term: [[i, round(w * math.log(1 + total / len(docs)), 4)] for i, w in docs.items()]
+                for term, docs in postings.items()
+            },
+        }
+        try:
+            with open(self._index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, separators=(",", ":"))
+        except OSError as e:
+            print(f"Could not save policy index to {self._index_path}: {e}")
+        return index
+
+    def lookup(self, question: str) -> Optional[Dict[str, str]]:
+        scores: Dict[int, float] = defaultdict(float)
+        specific = False
+        for term in set(tokenize(question)):
+            postings = self._index["postings"].get(term, [])
+            specific = specific or (bool(postings) and term not in _GENERIC)
+            for section, weight in postings:
+                scores[section] += weight
+        if not specific:
+            return None
+        best = max(scores, key=lambda i: (scores[i], -i))
+        if scores[best] < self._min_score:
+            return None
+        source, title, _, body = self._index["sections"][best]
+        return {"source": source, "section": title, "text": body}
+
+    def lookup_text(self, question: str) -> str:
+        """lookup() formatted as plain text for a tool result"""
+        match = self.lookup(question)
+        if match is None:
+            return "No matching policy section."
+        return f"{match['section']} ({match['source']}):\n{match['text']}"
@@ -0,0 +1,208 @@
+# ann_index.py
+
+"""Selectable FAISS index types for the retrievers, plus a recall-vs-latency harness.
+
+Index configs are short strings so they can come from the environment or the CLI:
+
+    flat                              exact search (FAISS's default)
+    ivf:nlist=256,nprobe=16           inverted lists, probe `nprobe` of `nlist` cells
+    hnsw:M=32,efSearch=64             graph index
+    ivfpq:nlist=256,m=16,nprobe=16    inverted lists with product-quantized vectors
+    pq:m=16                           product quantization only
+
+Evaluate configs against a labeled question set and get a recommendation:
+
+    python ann_index.py quantum-document.docx questions.jsonl --k 4
+
+The document is chunked with chunk_store.ChunkStore, with the same sizes as the
+retriever by default. questions.jsonl has one {"question": ..., "answer": ...} per
+line; a chunk counts as relevant if its parent passage (what the retriever
+returns) contains the answer text.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+DEFAULT_CONFIGS = [
+    "flat",
+    "ivf:nlist=64,nprobe=8",
+    "ivf:nlist=64,nprobe=16",
+    "hnsw:M=16,efSearch=32",
+    "hnsw:M=32,efSearch=64",
+    "ivfpq:nlist=64,m=16,nprobe=16",
+    "pq:m=32",
+]
+
+
+def parse_config(spec: str) -> Tuple[str, Dict[str, int]]:
+    kind, _, params = spec.strip().partition(":")
+    values = {}
+    for pair in filter(None, params.split(",")):
+        key, _, value = pair.partition("=")
+        values[key.strip()] = int(value)
+    kind = kind.lower()
+    if kind not in ("flat", "ivf", "hnsw", "ivfpq", "pq"):
+        raise ValueError(f"Unknown index type {kind!r} in {spec!r}")
+    return kind, values
+
+
+def _pq_m(dim: int, m: int) -> int:
+    # m must divide the dimension; take the closest divisor not above the request
+    while dim % m:
+        m -= 1
+    return m
+
+
+def build_index(vectors: np.ndarray, spec: str = "flat", memory_budget: Optional[int] = None):
+    """Build and fill a FAISS index for `vectors` (float32, one row per chunk).
+
+    Training-based parameters are clamped to what the data can support: IVF needs
+    ~39 training points per list, PQ needs 2**nbits points per codebook. Raises
+    ValueError if the index is bigger than `memory_budget` bytes.
+    """
+    kind, params = parse_config(spec)
+    count, dim = vectors.shape
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params.get("M", 32))
+        index.hnsw.efConstruction = params.get("efConstruction", 40)
+        index.hnsw.efSearch = params.get("efSearch", 64)
+    else:
+        nlist = max(1, min(params.get("nlist", 64), count // 39))
+        nbits = max(1, min(params.get("nbits", 8), int(math.log2(max(count, 2)))))
+        m = _pq_m(dim, params.get("m", 16))
+        factory = {
+            "ivf": f"IVF{nlist},Flat",
+            "ivfpq": f"IVF{nlist},PQ{m}x{nbits}",
+            "pq": f"PQ{m}x{nbits}",
+        }[kind]
+        index = faiss.index_factory(dim, factory)
+        if kind in ("ivf", "ivfpq"):
+            faiss.extract_index_ivf(index).nprobe = min(params.get("nprobe", 8), nlist)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    if memory_budget is not None and index_bytes(index) > memory_budget:
+        raise ValueError(f"Index {spec!r} needs {index_bytes(index)} bytes, over the {memory_budget} byte budget")
+    return index
+
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def evaluate(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    relevant: Sequence[set],
+    specs: Sequence[str] = DEFAULT_CONFIGS,
+    k: int = 4,
+    memory_budget: Optional[int] = None,
+) -> List[Dict[str, object]]:
+    """Measure each index config on the same vectors and queries.
+
+    recall is the share of questions with a relevant chunk in the top k;
+    ann_recall is the overlap of the top k with exact (flat) search.
+    """
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for spec in specs:
+        start = time.perf_counter()
+        index = build_index(vectors, spec)
+        build_seconds = time.perf_counter() - start
+        size = index_bytes(index)
+
+        latencies = []
+        found = np.empty((len(queries), k), dtype="int64")
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            _, ids = index.search(query.reshape(1, -1), k)
+            latencies.append(time.perf_counter() - start)
+            found[i] = ids[0]
+        latencies.sort()
+
+        hits = sum(1 for ids, wanted in zip(found, relevant) if wanted & set(ids.tolist()))
+        overlap = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+        results.append({
+            "config": spec,
+            "recall": hits / len(queries),
+            "ann_recall": overlap / (len(queries) * k),
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            "build_s": build_seconds,
+            "bytes": size,
+            "within_budget": memory_budget is None or size <= memory_budget,
+        })
+    return results
+
+
+def recommend(results: List[Dict[str, object]], min_recall: float = 0.95) -> Dict[str, object]:
+    """Fastest config within budget whose recall is at least `min_recall` of the best recall seen"""
+    best_recall = max(r["recall"] for r in results)
+    eligible = [r for r in results if r["within_budget"] and r["recall"] >= min_recall * best_recall]
+    if not eligible:
+        eligible = [r for r in results if r["within_budget"]] or results
+    return min(eligible, key=lambda r: (r["p95_ms"], r["bytes"]))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from dotenv import load_dotenv
+    from langchain_community.document_loaders import Docx2txtLoader, TextLoader
+    from langchain_openai import OpenAIEmbeddings
+
+    from chunk_store import ChunkStore
+
+    parser = argparse.ArgumentParser(description="Compare FAISS index types on a labeled question set")
+    parser.add_argument("document")
+    parser.add_argument("questions", help="JSONL with question and answer fields")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--configs", nargs="*", default=DEFAULT_CONFIGS)
+    parser.add_argument("--memory-budget", type=int, help="max index size in bytes")
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    # Defaults match langchain_exact_text_retriever.py
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--parent-tokens", type=int, default=600)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    loader = Docx2txtLoader if args.document.endswith(".docx") else TextLoader
+    store = ChunkStore(chunk_tokens=args.chunk_tokens, parent_tokens=args.parent_tokens)
+    for document in loader(args.document).load():
+        store.add_text(document.metadata.get("source", args.document), document.page_content)
+    chunks = [store.text(i) for i in range(len(store))]
+    passages = [store.parent_text(i).lower() for i in range(len(store))]
+    with open(args.questions, encoding="utf-8") as f:
+        labeled = [json.loads(line) for line in f if line.strip()]
+
+    embeddings = OpenAIEmbeddings(api_key=os.getenv("OPEN_AI_API_KEY"))
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype="float32")
+    queries = np.asarray(embeddings.embed_documents([q["question"] for q in labeled]), dtype="float32")
+    relevant = [
+        {i for i, passage in enumerate(passages) if q["answer"].lower() in passage} for q in labeled
+    ]
+
+    results = evaluate(vectors, queries, relevant, args.configs, args.k, args.memory_budget)
+    print(f"{len(chunks)} chunks, {len(labeled)} questions, k={args.k}\n")
+    print(f"{'config':<32} {'recall':>7} {'ann':>6} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8} {'KiB':>9}")
+    for r in results:
+        flag = "" if r["within_budget"] else "  (over budget)"
+        print(
+            f"{r['config']:<32} {r['recall']:>7.2f} {r['ann_recall']:>6.2f} {r['p50_ms']:>8.3f} "
+            f"{r['p95_ms']:>8.3f} {r['build_s']:>8.3f} {r['bytes'] / 1024:>9.1f}{flag}"
+        )
+    print(f"\nRecommended: {recommend(results, args.min_recall)['config']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# bootstrap.py
+
+"""Fast startup helpers for the entry-point scripts.
+
+- lazy_module("autogen_ext.models.openai") returns a module whose code only runs
+  on first attribute access, so paths that never touch it never pay for it.
+- `python bootstrap.py importtime calctimemain` prints the slowest imports of a module.
+- `python bootstrap.py serve` starts a worker that preloads the heavy packages and
+  forks a fresh child per request; `python bootstrap.py run calctimemain.py ...`
+  runs a script in such a child (or in-process if no worker is running), so repeat
+  runs skip the import cost.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import runpy
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+from typing import List, Optional
+
+DEFAULT_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bootstrap.sock")
+# Only modules that start no threads on import: the worker forks after loading them,
+# and a child inherits a lock held by some other thread forever. The Agents SDK
+# (`agents`, whose trace exporter runs a background thread) and gradio are left out.
+DEFAULT_PRELOAD = [
+    "dotenv",
+    "autogen_core",
+    "autogen_agentchat.agents",
+    "autogen_agentchat.teams",
+    "autogen_ext.models.openai",
+    "autogen_ext.tools.mcp",
+]
+_EXIT = struct.Struct("!i")
+
+
+def lazy_module(name: str):
+    """Import `name` lazily: the module object is returned now, its code runs on first use"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def import_time_report(module: str, top: int = 20) -> str:
+    """Import `module` in a fresh interpreter with -X importtime and list the slowest imports"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented under the module that triggered them
+        rows.append((int(cumulative_us), int(self_us), name[1:]))
+    if proc.returncode != 0:
+        return f"Importing {module} failed:\n{proc.stderr.splitlines()[-1] if proc.stderr else ''}"
+    total = sum(r[0] for r in rows if not r[2].startswith(" "))
+    lines = [f"{module}: {total / 1000:.1f} ms total, {len(rows)} modules", f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        lines.append(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name.strip()}")
+    return "\n".join(lines)
+
+
+def _run_script(script: str, argv: List[str]) -> int:
+    sys.argv = [script] + argv
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+
+def _handle(conn: socket.socket) -> None:
+    # Runs in the forked child: adopt the client's stdio, cwd, env and argv
+    message, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+    request = json.loads(message)
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    conn.sendall(_EXIT.pack(os.getpid()))
+    code = 1
+    try:
+        code = _run_script(request["script"], request["argv"])
+    except BaseException:
+        # os._exit below skips the interpreter's own traceback printing
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        conn.sendall(_EXIT.pack(code))
+        os._exit(code)
+
+
+def serve(path: str = DEFAULT_SOCKET, preload: Optional[List[str]] = None) -> None:
+    for name in preload if preload is not None else DEFAULT_PRELOAD:
+        before = set(threading.enumerate())
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Skipping preload of {name}: {e}")
+        started = [t.name for t in set(threading.enumerate()) - before]
+        if started:
+            print(f"Warning: importing {name} started threads ({', '.join(started)}); "
+                  "forked runs may hang, leave it out of --preload")
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    # Children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    print(f"Prewarmed worker listening on {path}")
+    try:
+        while True:
+            conn, _ = server.accept()
+            if os.fork() == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                _handle(conn)
+            conn.close()
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+def run(script: str, argv: List[str], path: str = DEFAULT_SOCKET) -> int:
+    """Run `script` in the prewarmed worker if one is listening, otherwise in this process"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return _run_script(script, argv)
+
+    request = {"script": os.path.abspath(script), "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+    socket.send_fds(client, [json.dumps(request).encode()], [0, 1, 2])
+    (pid,) = _EXIT.unpack(client.recv(_EXIT.size, socket.MSG_WAITALL))
+    # Ctrl-C reaches this process, not the forked child
+    signal.signal(signal.SIGINT, lambda *_: os.kill(pid, signal.SIGINT))
+    data = client.recv(_EXIT.size, socket.MSG_WAITALL)
+    client.close()
+    return _EXIT.unpack(data)[0] if len(data) == _EXIT.size else 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fast startup helpers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importtime = commands.add_parser("importtime", help="print the slowest imports of a module")
+    importtime.add_argument("module")
+    importtime.add_argument("--top", type=int, default=20)
+    serve_cmd = commands.add_parser("serve", help="start a prewarmed fork-server worker")
+    serve_cmd.add_argument("--socket", default=DEFAULT_SOCKET)
+    serve_cmd.add_argument("--preload", help="comma-separated modules to import up front")
+    run_cmd = commands.add_parser("run", help="run a script through the worker")
+    run_cmd.add_argument("--socket", default=DEFAULT_SOCKET)
+    run_cmd.add_argument("script")
+    run_cmd.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "importtime":
+        print(import_time_report(args.module, args.top))
+    elif args.command == "serve":
+        serve(args.socket, args.preload.split(",") if args.preload else None)
+    else:
+        sys.exit(run(args.script, args.args, args.socket))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,14 +1,14 @@
 import asyncio
 import os
-from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
-from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.conditions import MaxMessageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.ui import Console
-from autogen_core.models import ModelFamily, ModelInfo
+from autogen_core.models import ModelFamily
 from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_ext.agents.web_surfer import MultimodalWebSurfer
 from datetime import datetime
 from dotenv import load_dotenv
+from context_compaction import TokenBudgetChatCompletionContext
+from model_router import Backend, RouterChatCompletionClient
 
 def calculator(a: float, b: float, operator: str) -> str:
     print('Calc invoked...')
@@ -36,7 +36,7 @@ def get_current_time():
     return datetime.now().strftime("%I:%M %p")
 
 async def main() -> None:
-    model_client = OpenAIChatCompletionClient(
+    local_client = OpenAIChatCompletionClient(
         base_url='http://127.0.0.1:1234/v1',
             model='gemma-3-4b-it',
             api_key=os.getenv("OPEN_AI_API_KEY"),
@@ -47,9 +47,26 @@ async def main() -> None:
                 "family": ModelFamily.GPT_4O,
             }
     )
+    openai_client = OpenAIChatCompletionClient(
+            model='gpt-4o-mini',
+            api_key=os.getenv("OPEN_AI_API_KEY"),
+            model_info={
+                "vision": True,
+                "function_calling": True,
+                "json_output": True,
+                "family": ModelFamily.GPT_4O,
+            }
+    )
+    # Prefer the local model; hedge to OpenAI if it is slow and fall back if it errors
+    model_client = RouterChatCompletionClient(
+        [Backend("local", local_client), Backend("openai", openai_client)],
+        latency_slo=5.0,
+        hedge_delay=3.0,
+    )
     agent1 = AssistantAgent("assistant", 
                             model_client=model_client, 
                             tools=[calculator, get_current_time],
+                            model_context=TokenBudgetChatCompletionContext(token_budget=3000),
                             system_message="""You are a helpful assistant that has the ability to get the current time and perform calulations as function calls"""
                             )
     #agent2 = AssistantAgent("Assistant2", model_client=model_client)
@@ -69,4 +86,5 @@ async def main() -> None:
     # async for message in stream:
     #     print(message)
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
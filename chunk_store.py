@@ -0,0 +1,235 @@
+# chunk_store.py
+
+"""Offset-based chunk store: each source text is kept once, chunks are (doc, start, end).
+
+Instead of copying every chunk into its own Document.page_content, ChunkStore
+keeps the source bytes once (memory-mapped for files) and records chunks as
+offsets in typed arrays: 16 bytes per child chunk (doc, start, end, parent)
+and 12 per parent chunk.
+Chunks end on sentence boundaries and are sized in tokens. Small child chunks are
+embedded and searched; at query time each hit can be expanded to its larger
+parent chunk so the model sees whole passages.
+"""
+
+import mmap
+import re
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+_SENTENCE_END = re.compile(rb"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+
+
+def _default_token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except ImportError:
+        return lambda text: len(text) // 4 + 1
+
+
+class ChunkStore:
+    def __init__(self, chunk_tokens: int = 200, parent_tokens: int = 800, token_counter: Optional[Callable[[str], int]] = None):
+        self._chunk_tokens = chunk_tokens
+        self._parent_tokens = parent_tokens
+        self._count_tokens = token_counter or _default_token_counter()
+        self._sources: List[Union[bytes, mmap.mmap]] = []
+        self._names: List[str] = []
+        self._files = []
+        # child chunks
+        self._doc = array("I")
+        self._start = array("I")
+        self._end = array("I")
+        self._parent = array("I")
+        # parent chunks
+        self._parent_doc = array("I")
+        self._parent_start = array("I")
+        self._parent_end = array("I")
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def add_text(self, name: str, text: str) -> int:
+        """Add an in-memory text (stored once as UTF-8); returns its doc id"""
+        return self._add(name, text.encode("utf-8"))
+
+    def add_file(self, path: str) -> int:
+        """Add a UTF-8 text file, memory-mapped rather than read into memory; returns its doc id"""
+        f = open(path, "rb")
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            data = b""
+        self._files.append(f)
+        return self._add(path, data)
+
+    def _sentences(self, data) -> Iterable[tuple]:
+        position = 0
+        for m in _SENTENCE_END.finditer(data):
+            yield position, m.end()
+            position = m.end()
+        if position < len(data):
+            yield position, len(data)
+
+    def _pieces(self, data, start: int, end: int) -> Iterable[tuple]:
+        # Split one over-long sentence at whitespace, roughly chunk_tokens at a time
+        step = self._chunk_tokens * 4
+        while end - start > step:
+            cut = data.rfind(b" ", start, start + step)
+            cut = cut + 1 if cut > start else start + step
+            yield start, cut
+            start = cut
+        yield start, end
+
+    def _add(self, name: str, data) -> int:
+        doc_id = len(self._sources)
+        self._sources.append(data)
+        self._names.append(name)
+
+        def tokens(start, end):
+            return self._count_tokens(bytes(data[start:end]).decode("utf-8", errors="ignore"))
+
+        chunk_start, chunk_tokens = None, 0
+        parent_start, parent_tokens = None, 0
+
+        def close_chunk(end):
+            nonlocal chunk_start, chunk_tokens, parent_start, parent_tokens
+            if chunk_start is None:
+                return
+            if parent_start is None:
+                parent_start = chunk_start
+            elif parent_tokens + chunk_tokens > self._parent_tokens:
+                close_parent(chunk_start)
+                parent_start = chunk_start
+            self._doc.append(doc_id)
+            self._start.append(chunk_start)
+            self._end.append(end)
+            self._parent.append(len(self._parent_doc))
+            parent_tokens += chunk_tokens
+            chunk_start, chunk_tokens = None, 0
+
+        def close_parent(end):
+            nonlocal parent_start, parent_tokens
+            self._parent_doc.append(doc_id)
+            self._parent_start.append(parent_start)
+            self._parent_end.append(end)
+            parent_start, parent_tokens = None, 0
+
+        for sentence_start, sentence_end in self._sentences(data):
+            for start, end in self._pieces(data, sentence_start, sentence_end):
+                count = tokens(start, end)
+                if chunk_start is not None and chunk_tokens + count > self._chunk_tokens:
+                    close_chunk(start)
+                if chunk_start is None:
+                    chunk_start = start
+                chunk_tokens += count
+        close_chunk(len(data))
+        if parent_start is not None:
+            close_parent(len(data))
+        return doc_id
+
+    def _slice(self, doc: int, start: int, end: int) -> str:
+        return bytes(self._sources[doc][start:end]).decode("utf-8", errors="ignore").strip()
+
+    def text(self, chunk: int) -> str:
+        return self._slice(self._doc[chunk], self._start[chunk], self._end[chunk])
+
+    def parent_id(self, chunk: int) -> int:
+        return self._parent[chunk]
+
+    def parent_text(self, chunk: int) -> str:
+        parent = self._parent[chunk]
+        return self._slice(self._parent_doc[parent], self._parent_start[parent], self._parent_end[parent])
+
+    def metadata(self, chunk: int) -> Dict[str, object]:
+        return {
+            "chunk": chunk,
+            "parent": self._parent[chunk],
+            "source": self._names[self._doc[chunk]],
+            "start": self._start[chunk],
+            "end": self._end[chunk],
+        }
+
+    def metadata_bytes(self) -> int:
+        arrays = (self._doc, self._start, self._end, self._parent, self._parent_doc, self._parent_start, self._parent_end)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def close(self) -> None:
+        for data in self._sources:
+            if isinstance(data, mmap.mmap):
+                data.close()
+        for f in self._files:
+            f.close()
+        self._sources.clear()
+        self._files.clear()
+
+
+def chunk_vectorstore(
+    store: ChunkStore,
+    embeddings,
+    spec: str = "flat",
+    expand: bool = True,
+    batch_size: int = 256,
+    memory_budget: Optional[int] = None,
+):
+    """Build a langchain FAISS store over the child chunks without copying their text.
+
+    Chunk text is only materialized transiently for embedding and when a hit is
+    returned; with `expand` the returned Document holds the parent chunk's text.
+    Raises ValueError if the index is bigger than `memory_budget` bytes.
+    """
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+    from langchain_community.docstore.base import Docstore
+
+    from ann_index import build_index
+
+    class ChunkDocstore(Docstore):
+        def search(self, search: str):
+            chunk = int(search)
+            content = store.parent_text(chunk) if expand else store.text(chunk)
+            return Document(page_content=content, metadata=store.metadata(chunk))
+
+    vectors = []
+    for first in range(0, len(store), batch_size):
+        texts = [store.text(i) for i in range(first, min(first + batch_size, len(store)))]
+        vectors.extend(embeddings.embed_documents(texts))
+    index = build_index(np.asarray(vectors, dtype="float32"), spec, memory_budget)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=ChunkDocstore(),
+        index_to_docstore_id={i: str(i) for i in range(len(store))},
+    )
+
+
+def parent_retriever(vectorstore, k: int = 4, fetch_k: int = 20):
+    """A retriever over chunk_vectorstore() that returns `k` distinct parent passages.
+
+    Several child hits often share a parent; fetching `fetch_k` children and
+    dropping repeats here keeps the same passage from reaching a reranker or
+    prompt more than once.
+    """
+    from langchain_core.retrievers import BaseRetriever
+
+    class ParentRetriever(BaseRetriever):
+        def _get_relevant_documents(self, query: str, *, run_manager):
+            return unique_parents(vectorstore.similarity_search(query, k=max(k, fetch_k)))[:k]
+
+    return ParentRetriever()
+
+
+def unique_parents(docs) -> list:
+    """Drop hits whose parent passage was already returned by a better-ranked child"""
+    seen = set()
+    unique = []
+    for doc in docs:
+        parent = doc.metadata.get("parent")
+        if parent in seen:
+            continue
+        seen.add(parent)
+        unique.append(doc)
+    return unique
@@ -0,0 +1,157 @@
+# context_compaction.py
+
+from collections import deque
+from typing import Callable, Deque, List, Optional, Sequence
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import (
+    AssistantMessage,
+    ChatCompletionClient,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+
+def estimate_tokens(messages: Sequence[LLMMessage]) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting"""
+    return sum(len(str(m.content)) for m in messages) // 4 + 4 * len(messages)
+
+
+def _describe(message: LLMMessage, max_chars: int) -> str:
+    if isinstance(message, FunctionExecutionResultMessage):
+        text = " | ".join(r.content for r in message.content)
+        source = "tool"
+    elif isinstance(message, AssistantMessage) and not isinstance(message.content, str):
+        text = ", ".join(f"called {c.name}({c.arguments})" for c in message.content)
+        source = message.source
+    else:
+        text = str(message.content)
+        source = getattr(message, "source", "system")
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return f"{source}: {text}"
+
+
+class TokenBudgetChatCompletionContext(ChatCompletionContext):
+    """A model context that keeps each agent's prompt under a token budget.
+
+    - Tool outputs larger than `max_tool_output_chars` are cut down (head and tail kept).
+    - The newest `keep_recent` messages are always sent verbatim, and a tool call is
+      never separated from its result.
+    - Older messages that do not fit are replaced with a summary. The latest summary
+      is cached and extended incrementally, so each older message is summarized once.
+      Pass a `summarizer` model client to have an LLM write them; otherwise a short
+      extractive summary is used.
+    - `last_saved_tokens`, `saved_tokens` (the last `report_window` turns) and
+      `total_saved_tokens` report how much was saved.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 4000,
+        keep_recent: int = 6,
+        max_tool_output_chars: int = 2000,
+        summarizer: Optional[ChatCompletionClient] = None,
+        token_counter: Callable[[Sequence[LLMMessage]], int] = estimate_tokens,
+        on_report: Optional[Callable[[int, int], None]] = None,
+        initial_messages: Optional[List[LLMMessage]] = None,
+        report_window: int = 100,
+    ):
+        super().__init__(initial_messages)
+        self._token_budget = token_budget
+        self._keep_recent = keep_recent
+        self._max_tool_output_chars = max_tool_output_chars
+        self._summarizer = summarizer
+        self._count = token_counter
+        self._on_report = on_report
+        self._summary_tokens = token_budget // 4
+        # The latest summary and how many messages it covers
+        self._summary_count = 0
+        self._summary_text = ""
+        self.last_saved_tokens = 0
+        self.saved_tokens: Deque[int] = deque(maxlen=report_window)
+        self.total_saved_tokens = 0
+
+    def _elide(self, message: LLMMessage) -> LLMMessage:
+        if not isinstance(message, FunctionExecutionResultMessage):
+            return message
+        limit = self._max_tool_output_chars
+        if all(len(r.content) <= limit for r in message.content):
+            return message
+        results = []
+        for r in message.content:
+            if len(r.content) > limit:
+                half = limit // 2
+                elided = len(r.content) - 2 * half
+                r = r.model_copy(update={"content": f"{r.content[:half]}\n...[{elided} chars elided]...\n{r.content[-half:]}"})
+            results.append(r)
+        return message.model_copy(update={"content": results})
+
+    @staticmethod
+    def _boundary(messages: Sequence[LLMMessage], index: int) -> int:
+        # Move the split back so a tool result is never separated from its call
+        while 0 < index < len(messages) and isinstance(messages[index], FunctionExecutionResultMessage):
+            index -= 1
+        return max(index, 0)
+
+    async def _summary(self, older: Sequence[LLMMessage]) -> str:
+        count = len(older)
+        if count == self._summary_count:
+            return self._summary_text
+        if count > self._summary_count:
+            done, previous = self._summary_count, self._summary_text
+        else:
+            # The split moved back (e.g. a bigger tail fits now); start over
+            done, previous = 0, ""
+        new_lines = "\n".join(_describe(m, 300) for m in older[done:])
+        if self._summarizer is not None:
+            result = await self._summarizer.create(
+                [
+                    SystemMessage(content="Summarize the conversation so far in a few short sentences. Keep names, numbers, file paths and decisions."),
+                    UserMessage(content=f"Earlier summary:\n{previous}\n\nNew messages:\n{new_lines}", source="user"),
+                ]
+            )
+            summary = str(result.content)
+        else:
+            summary = (previous + "\n" + new_lines).strip()
+            max_chars = self._summary_tokens * 4
+            if len(summary) > max_chars:
+                summary = "..." + summary[-max_chars:]
+        self._summary_count, self._summary_text = count, summary
+        return summary
+
+    async def get_messages(self) -> List[LLMMessage]:
+        full_tokens = self._count(self._messages)
+        head = [m for m in self._messages if isinstance(m, SystemMessage)]
+        body = [self._elide(m) for m in self._messages if not isinstance(m, SystemMessage)]
+
+        messages = head + body
+        if self._count(messages) > self._token_budget:
+            split = self._boundary(body, len(body) - self._keep_recent)
+            # Grow the verbatim tail while it still fits, leaving room for the summary
+            while split > 0:
+                candidate = self._boundary(body, split - 1)
+                if self._count(head + body[candidate:]) + self._summary_tokens > self._token_budget:
+                    break
+                split = candidate
+            if split > 0:
+                summary = await self._summary(body[:split])
+                messages = head + [UserMessage(content=f"Summary of the earlier conversation:\n{summary}", source="context_summary")] + body[split:]
+
+        self.last_saved_tokens = max(0, full_tokens - self._count(messages))
+        self.saved_tokens.append(self.last_saved_tokens)
+        self.total_saved_tokens += self.last_saved_tokens
+        if self._on_report is not None:
+            self._on_report(full_tokens, self.last_saved_tokens)
+        return messages
+
+    async def clear(self) -> None:
+        await super().clear()
+        self._summary_count, self._summary_text = 0, ""
+
+    async def load_state(self, state) -> None:
+        await super().load_state(state)
+        self._summary_count, self._summary_text = 0, ""
@@ -0,0 +1,198 @@
+# file_index.py
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "for", "from", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "the", "to", "was", "what", "when", "where", "which", "who", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _Chunk:
+    __slots__ = ("path", "start_line", "text", "terms", "length", "vector")
+
+    def __init__(self, path: str, start_line: int, text: str):
+        self.path = path
+        self.start_line = start_line
+        self.text = text
+        self.terms = Counter(tokenize(text))
+        self.length = sum(self.terms.values())
+        self.vector: Optional[List[float]] = None
+
+
+class FileSearchIndex:
+    """Incremental BM25 index (plus optional embeddings) over a folder of text files.
+
+    Files are split into paragraph-sized chunks. `refresh()` re-reads only files whose
+    mtime or size changed and drops deleted ones, so keeping the index current costs a
+    stat() per file. `search()` refreshes first (at most once every `refresh_interval`
+    seconds) and returns the best matching snippets.
+
+    Pass `embed` (a function mapping a list of strings to a list of vectors) to add a
+    semantic score on top of the keyword score.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        chunk_chars: int = 800,
+        max_file_bytes: int = 2 * 1024 * 1024,
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        semantic_weight: float = 0.5,
+        refresh_interval: float = 2.0,
+    ):
+        self._root = root
+        self._chunk_chars = chunk_chars
+        self._max_file_bytes = max_file_bytes
+        self._embed = embed
+        self._semantic_weight = semantic_weight
+        self._refresh_interval = refresh_interval
+        self._last_refresh: Optional[float] = None
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._chunks: Dict[str, List[_Chunk]] = {}
+        # term -> number of chunks containing it
+        self._doc_freq: Counter = Counter()
+        self._postings: Dict[str, set] = defaultdict(set)
+        self._total_length = 0
+        self._chunk_count = 0
+        self._lock = threading.Lock()
+
+    def _split(self, path: str, text: str) -> List[_Chunk]:
+        chunks = []
+        lines = text.splitlines()
+        start, buffer, size = 0, [], 0
+        for number, line in enumerate(lines):
+            if not buffer:
+                start = number
+            buffer.append(line)
+            size += len(line) + 1
+            # Break on blank lines once the chunk is big enough, or when it is too big
+            if (not line.strip() and size >= self._chunk_chars // 2) or size >= self._chunk_chars:
+                chunks.append(_Chunk(path, start + 1, "\n".join(buffer).strip()))
+                buffer, size = [], 0
+        if buffer:
+            chunks.append(_Chunk(path, start + 1, "\n".join(buffer).strip()))
+        return [c for c in chunks if c.text]
+
+    def _remove(self, path: str) -> None:
+        for chunk in self._chunks.pop(path, []):
+            for term in chunk.terms:
+                self._doc_freq[term] -= 1
+                self._postings[term].discard(chunk)
+                if self._doc_freq[term] <= 0:
+                    del self._doc_freq[term]
+                    del self._postings[term]
+            self._total_length -= chunk.length
+            self._chunk_count -= 1
+        self._files.pop(path, None)
+
+    def _add(self, path: str, signature: Tuple[int, int]) -> None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            # Binary or unreadable files are skipped but remembered so they are not retried
+            self._files[path] = signature
+            return
+        chunks = self._split(path, text)
+        if self._embed is not None and chunks:
+            for chunk, vector in zip(chunks, self._embed([c.text for c in chunks])):
+                chunk.vector = vector
+        for chunk in chunks:
+            for term in chunk.terms:
+                self._doc_freq[term] += 1
+                self._postings[term].add(chunk)
+            self._total_length += chunk.length
+            self._chunk_count += 1
+        self._chunks[path] = chunks
+        self._files[path] = signature
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the folder; returns the number of files (re)indexed"""
+        seen = set()
+        changed = 0
+        with self._lock:
+            for directory, _, names in os.walk(self._root):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if st.st_size > self._max_file_bytes:
+                        continue
+                    seen.add(path)
+                    signature = (st.st_mtime_ns, st.st_size)
+                    if self._files.get(path) == signature:
+                        continue
+                    self._remove(path)
+                    self._add(path, signature)
+                    changed += 1
+            for path in list(self._files):
+                if path not in seen:
+                    self._remove(path)
+                    changed += 1
+            self._last_refresh = time.monotonic()
+        return changed
+
+    def search(self, query: str, top_k: int = 5, snippet_chars: int = 400) -> List[Dict[str, object]]:
+        if self._last_refresh is None or time.monotonic() - self._last_refresh >= self._refresh_interval:
+            self.refresh()
+        terms = tokenize(query)
+        with self._lock:
+            if not self._chunk_count:
+                return []
+            avg_length = self._total_length / self._chunk_count
+            scores: Dict[_Chunk, float] = defaultdict(float)
+            k1, b = 1.5, 0.75
+            for term in set(terms):
+                df = self._doc_freq.get(term)
+                if not df:
+                    continue
+                idf = math.log(1 + (self._chunk_count - df + 0.5) / (df + 0.5))
+                for chunk in self._postings[term]:
+                    tf = chunk.terms[term]
+                    scores[chunk] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * chunk.length / avg_length))
+
+            if self._embed is not None:
+                query_vector = self._embed([query])[0]
+                best = max(scores.values(), default=0.0) or 1.0
+                candidates = [c for chunks in self._chunks.values() for c in chunks if c.vector is not None]
+                for chunk in candidates:
+                    scores[chunk] = scores.get(chunk, 0.0) / best + self._semantic_weight * _cosine(query_vector, chunk.vector)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [
+                {
+                    "path": os.path.relpath(chunk.path, self._root),
+                    "line": chunk.start_line,
+                    "score": round(score, 3),
+                    "snippet": chunk.text[:snippet_chars],
+                }
+                for chunk, score in ranked
+                if score > 0
+            ]
+
+    def search_text(self, query: str, top_k: int = 5) -> str:
+        """search() formatted as plain text for a tool result"""
+        results = self.search(query, top_k=top_k)
+        if not results:
+            return "No matching files."
+        return "\n\n".join(f"{r['path']} (line {r['line']}, score {r['score']}):\n{r['snippet']}" for r in results)
@@ -0,0 +1,102 @@
+# fs_fast_path.py
+
+import posixpath
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from autogen_core import CancellationToken
+
+# Simple, unambiguous requests that map straight onto one filesystem MCP tool.
+# Anything that does not match one of these goes to the agents.
+# "the directory" is not a path called "directory"
+_PATH = r"(?!(?:directory|folder|dir)$)['\"]?(?P<path>[\w./-]+?)['\"]?"
+_DIR = r"(?: the)?(?: directory| folder| dir)?"
+INTENTS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(rf"^(?:please )?(?:list|show)(?: me)?(?: all)?(?: of)?(?: the)? files (?:in|under|inside)(?: the)?(?: {_PATH}{_DIR}| (?:directory|folder|dir))$", re.IGNORECASE), "list_directory"),
+    (re.compile(rf"^(?:please )?(?:list|show)(?: me)?(?: the)? (?:contents of )?(?:the )?(?:directory|folder) {_PATH}$", re.IGNORECASE), "list_directory"),
+    (re.compile(rf"^(?:please )?(?:read|open|cat|show)(?: me)?(?: the)?(?: contents of)?(?: the)? file {_PATH}$", re.IGNORECASE), "read_file"),
+    (re.compile(rf"^(?:please )?(?:read|open|cat) {_PATH}\.(?P<ext>[a-z0-9]{{1,5}})$", re.IGNORECASE), "read_file"),
+    (re.compile(rf"^(?:please )?(?:search|find|look)(?: for)? files? (?:named|matching|called) ['\"]?(?P<pattern>[\w.*-]+)['\"]?(?: in(?: the)?(?: {_PATH}{_DIR}| (?:directory|folder|dir)))?$", re.IGNORECASE), "search_files"),
+]
+# Older servers call it read_file, newer ones read_text_file
+TOOL_FALLBACKS: Dict[str, Tuple[str, ...]] = {"read_file": ("read_text_file",)}
+
+
+def _text(result: Any) -> str:
+    if isinstance(result, list):
+        return "\n".join(getattr(item, "text", str(item)) for item in result)
+    return str(result)
+
+
+class FilesystemFastPath:
+    """Answers simple list/read/search requests with a direct MCP tool call.
+
+    A full Swarm run for these takes at least `llm_calls_per_request` model calls
+    (assistant -> handoff -> tool expert -> tool call -> handoff back -> answer).
+    `avoided_llm_calls` counts how many were skipped.
+    """
+
+    def __init__(self, tools: Sequence[Any], root: str, root_aliases: Sequence[str] = (), llm_calls_per_request: int = 4):
+        self._tools = {tool.name: tool for tool in tools}
+        self._root = root
+        self._root_aliases = {".", "", posixpath.basename(root.rstrip("/"))} | set(root_aliases)
+        self._llm_calls_per_request = llm_calls_per_request
+        self.hits = 0
+        self.misses = 0
+        self.avoided_llm_calls = 0
+
+    def _resolve(self, path: Optional[str]) -> Optional[str]:
+        """Map a path from the request onto the server root; None if it could leave the root"""
+        if path is None:
+            return self._root
+        parts = [p for p in path.split("/") if p not in ("", ".")]
+        if ".." in parts:
+            return None
+        # "sample_files/cities.txt" means <root>/cities.txt
+        if parts and parts[0] in self._root_aliases:
+            parts = parts[1:]
+        return posixpath.join(self._root, *parts) if parts else self._root
+
+    def _tool_name(self, name: str) -> Optional[str]:
+        for candidate in (name,) + TOOL_FALLBACKS.get(name, ()):
+            if candidate in self._tools:
+                return candidate
+        return None
+
+    def match(self, task: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        text = " ".join(task.split()).rstrip(".?!")
+        for pattern, intent in INTENTS:
+            m = pattern.match(text)
+            tool_name = self._tool_name(intent) if m is not None else None
+            if tool_name is None:
+                continue
+            path = m.group("path")
+            if path is not None and m.groupdict().get("ext"):
+                path = f"{path}.{m.group('ext')}"
+            resolved = self._resolve(path)
+            if resolved is None:
+                return None
+            args = {"path": resolved}
+            if tool_name == "search_files":
+                args["pattern"] = m.group("pattern")
+            return tool_name, args
+        return None
+
+    async def try_run(self, task: str, cancellation_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Return the tool result for a simple request, or None if the agents should handle it"""
+        matched = self.match(task)
+        if matched is None:
+            self.misses += 1
+            return None
+        tool_name, args = matched
+        try:
+            result = await self._tools[tool_name].run_json(args, cancellation_token or CancellationToken())
+        except Exception as e:
+            # Let the agents deal with anything unexpected, e.g. a path that needs resolving
+            print(f"Fast path {tool_name}({args}) failed, falling back to agents: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.avoided_llm_calls += self._llm_calls_per_request
+        print(f"Fast path: {tool_name}({args}), avoided {self._llm_calls_per_request} LLM calls ({self.avoided_llm_calls} total)")
+        return _text(result)
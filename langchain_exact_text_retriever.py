@@ -32,27 +32,35 @@ from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import LLMChainExtractor
 from langchain.retrievers.document_compressors import LLMListwiseRerank
 from langchain_community.document_loaders import Docx2txtLoader
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import CharacterTextSplitter
 from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
+from chunk_store import ChunkStore, chunk_vectorstore, parent_retriever
 
 load_dotenv()
 
+# flat (exact) by default; e.g. FAISS_INDEX="hnsw:M=32,efSearch=64" for large archives.
+# Use `python ann_index.py` to pick a setting for your documents.
+FAISS_INDEX = os.getenv("FAISS_INDEX", "flat")
+# Optional cap on the index size in bytes
+FAISS_MEMORY_BUDGET = int(os.getenv("FAISS_MEMORY_BUDGET", "0")) or None
+
 def pretty_print_docs(docs) -> str:
     return(
         f"\n{'-' * 100}\n".join(
-            [f"Document {i+1}:\n\n" + d.page_content for i, d in enumerate(docs)]
+            f"Document {i+1}:\n\n{d.page_content}" for i, d in enumerate(docs)
         )
     )
 
-documents = Docx2txtLoader("quantum-document.docx").load()  #TextLoader("quantum-document.docx").load()
-text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-texts = text_splitter.split_documents(documents)
-retriever = FAISS.from_documents(texts, OpenAIEmbeddings(
+# Each source text is kept once; chunks are sentence-aligned offsets into it.
+# Small chunks are embedded and matched, hits come back as their parent passage
+# (each parent at most once, so the reranker never sees the same passage twice).
+chunk_store = ChunkStore(chunk_tokens=200, parent_tokens=600)
+for document in Docx2txtLoader("quantum-document.docx").load():  #TextLoader("quantum-document.docx").load()
+    chunk_store.add_text(document.metadata.get("source", "quantum-document.docx"), document.page_content)
+retriever = parent_retriever(chunk_vectorstore(chunk_store, OpenAIEmbeddings(
     api_key=os.getenv("OPEN_AI_API_KEY")
-)).as_retriever()
+), FAISS_INDEX, memory_budget=FAISS_MEMORY_BUDGET))
 
 llm = ChatOpenAI(
         # base_url='http://127.0.0.1:1234/v1',
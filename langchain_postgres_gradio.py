@@ -1,11 +1,16 @@
+import asyncio
 import gradio as gr
 import os
+import time
 from dotenv import load_dotenv
 from langchain_community.llms import OpenAI
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
 from langchain.agents.agent_types import AgentType
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from sqlalchemy import event as sa_event
+
+import metrics
 
 load_dotenv()
 
@@ -18,18 +23,40 @@ DB_NAME = "postgres"
 
 connection_string = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# How many SQL agent runs may stream at once; further requests wait in the queue
+CONCURRENCY_LIMIT = int(os.getenv("SQL_CONCURRENCY_LIMIT", "4"))
+MAX_QUEUE_SIZE = int(os.getenv("SQL_MAX_QUEUE_SIZE", "32"))
+
+# Series used on every request, created once
+requests_in_progress = metrics.REQUESTS_IN_PROGRESS.labels("sql")
+request_total_latency = metrics.REQUEST_LATENCY.labels("sql", "total")
+db_connect_latency = metrics.REQUEST_LATENCY.labels("sql", "db_connect")
+llm_latency = metrics.REQUEST_LATENCY.labels("sql", "llm")
+tool_latency = metrics.REQUEST_LATENCY.labels("sql", "tool")
+db_query_duration = metrics.DB_QUERY_DURATION.labels(DB_NAME)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    db_query_duration.observe(time.perf_counter() - conn.info["query_start"].pop())
+
 
 def setup_database():
     """Set up sample database tables and data if they don't exist"""
     # Create a SQLDatabase instance without including it in the LangChain components yet
     db = SQLDatabase.from_uri(connection_string)
+    sa_event.listen(db._engine, "before_cursor_execute", _before_cursor_execute)
+    sa_event.listen(db._engine, "after_cursor_execute", _after_cursor_execute)
     return db
 
 
 def advanced_sql_agent(db: SQLDatabase):
     """Create a more advanced LangChain SQL agent"""
     # Initialize the language model
-    llm = OpenAI(temperature=0, api_key=os.getenv("OPENAI_API_KEY"))
+    llm = OpenAI(temperature=0, api_key=os.getenv("OPENAI_API_KEY"), streaming=True)
     
     # Create toolkit and agent
     toolkit = SQLDatabaseToolkit(db=db, llm=llm)
@@ -50,6 +77,63 @@ def rag_query(user_input):
     return result
 
 
+async def rag_query_stream(user_input):
+    """Like rag_query, but yields the agent's thoughts, tool calls and answer as they arrive.
+
+    Each yield is the full transcript so far. Gradio closes the generator when the
+    client disconnects, which cancels the agent run.
+    """
+    requests_in_progress.inc()
+    start = time.perf_counter()
+    try:
+        # Connecting reflects the schema, keep it off the event loop
+        with db_connect_latency.time():
+            db = await asyncio.to_thread(setup_database)
+        agent = advanced_sql_agent(db)
+        transcript = ""
+        # run_id -> (start time, prompt chars, streamed chunks)
+        llm_runs = {}
+        tool_starts = {}
+        yield "Thinking..."
+        async for event in agent.astream_events({"input": user_input}, version="v2"):
+            kind = event["event"]
+            if kind == "on_llm_start":
+                prompts = event["data"].get("input", {}).get("prompts", [])
+                llm_runs[event["run_id"]] = [time.perf_counter(), sum(len(p) for p in prompts), 0]
+            elif kind == "on_llm_stream":
+                chunk = event["data"]["chunk"]
+                if event["run_id"] in llm_runs:
+                    llm_runs[event["run_id"]][2] += 1
+                transcript += getattr(chunk, "text", None) or str(getattr(chunk, "content", ""))
+                yield transcript
+            elif kind == "on_llm_end" and event["run_id"] in llm_runs:
+                started, prompt_chars, chunks = llm_runs.pop(event["run_id"])
+                seconds = time.perf_counter() - started
+                llm_latency.observe(seconds)
+                # Streamed completions report no usage: ~1 token per chunk out, ~4 chars per token in
+                model = event.get("metadata", {}).get("ls_model_name", "openai")
+                metrics.record_llm_call(model, prompt_chars // 4, chunks, seconds)
+            elif kind == "on_tool_start":
+                tool_starts[event["run_id"]] = time.perf_counter()
+                transcript += f"\n[running {event['name']}: {event['data'].get('input')}]\n"
+                yield transcript
+            elif kind == "on_tool_end":
+                if event["run_id"] in tool_starts:
+                    seconds = time.perf_counter() - tool_starts.pop(event["run_id"])
+                    tool_latency.observe(seconds)
+                    metrics.TOOL_CALLS.labels(event["name"]).inc()
+                    metrics.TOOL_CALL_DURATION.labels(event["name"]).observe(seconds)
+                transcript += f"[{event['name']} finished]\n"
+                yield transcript
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output")
+                if isinstance(output, dict) and "output" in output:
+                    yield output["output"]
+    finally:
+        requests_in_progress.dec()
+        request_total_latency.observe(time.perf_counter() - start)
+
+
 def main():
     """Main function that runs all examples"""
     try:
@@ -70,9 +154,13 @@ def main():
                 btn_clear = gr.Button("Clear")
                 btn_submit = gr.Button("Submit")
                 btn_submit.variant = "primary"
-                btn_submit.click(fn=rag_query, inputs=input_question, outputs=output_textbox)
+                # Streams partial output; Gradio closes the generator if the client disconnects
+                btn_submit.click(fn=rag_query_stream, inputs=input_question, outputs=output_textbox,
+                                 concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="sql")
 
         
+        iface.queue(max_size=MAX_QUEUE_SIZE)
+        metrics.start_metrics_server(env_var="SQL_METRICS_PORT", default_port=9465)
         iface.launch()
         
     except Exception as e:
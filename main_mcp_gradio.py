@@ -4,7 +4,22 @@ import gradio as gr
 import os
 from dotenv import load_dotenv
 
-from mcpfunction import run_mcp
+from metrics import start_metrics_server
+from mcpfunction import run_mcp, run_mcp_stream
+from session_manager import ConversationSession, SessionManager
+
+# How many agent runs may stream at once; further requests wait in the queue
+CONCURRENCY_LIMIT = int(os.getenv("MCP_CONCURRENCY_LIMIT", "4"))
+MAX_QUEUE_SIZE = int(os.getenv("MCP_MAX_QUEUE_SIZE", "32"))
+
+# Conversation history per browser session; idle ones are spilled to sessions/
+sessions = SessionManager(ConversationSession, max_live=int(os.getenv("MCP_MAX_LIVE_SESSIONS", "64")))
+
+
+async def answer(message: str, request: gr.Request):
+    async with sessions.session(request.session_hash) as conversation:
+        async for text in run_mcp_stream(message, conversation):
+            yield text
 
 if __name__ == "__main__":
     # message = "Look at my local files and find what my favorite city is for fall."
@@ -22,8 +37,12 @@ if __name__ == "__main__":
                 gr.ClearButton(components=input_question)
                 btn_submit = gr.Button("Submit")
                 btn_submit.variant = "primary"
-                btn_submit.click(fn=run_mcp, inputs=input_question, outputs=output_textbox)
+                # Streams partial output; Gradio closes the generator if the client disconnects
+                btn_submit.click(fn=answer, inputs=input_question, outputs=output_textbox,
+                                 concurrency_limit=CONCURRENCY_LIMIT, concurrency_id="mcp")
     
+        iface.queue(max_size=MAX_QUEUE_SIZE)
+        start_metrics_server(env_var="MCP_METRICS_PORT", default_port=9464)
         iface.launch()
         
     except Exception as e:
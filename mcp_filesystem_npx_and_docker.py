@@ -1,17 +1,49 @@
 import asyncio
 import os
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_ext.tools.mcp import StdioServerParams, mcp_server_tools
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.teams import RoundRobinGroupChat, SelectorGroupChat, Swarm
+from autogen_agentchat.teams import Swarm
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
-from autogen_core.models import ModelFamily, ModelInfo
+from autogen_core.models import ModelFamily
 from autogen_core import CancellationToken
-from autogen_agentchat.ui import Console
+from autogen_core.tools import BaseTool
 from dotenv import load_dotenv
+from bootstrap import lazy_module
+from context_compaction import TokenBudgetChatCompletionContext
+from fs_fast_path import FilesystemFastPath
+from mcp_fs_cache import FileToolCache
 
 load_dotenv()
 
+# Pulls in openai and tiktoken; requests answered by the fast path never need it
+openai_models = lazy_module("autogen_ext.models.openai")
+
+def report_context_savings(prompt_tokens: int, saved_tokens: int) -> None:
+    if saved_tokens:
+        print(f"Context compaction: {prompt_tokens} -> {prompt_tokens - saved_tokens} tokens ({saved_tokens} saved)")
+
+class CachedMcpTool(BaseTool):
+    """Wraps an MCP tool adapter so repeat reads are served from a FileToolCache"""
+
+    def __init__(self, tool, cache: FileToolCache):
+        super().__init__(
+            args_type=tool.args_type(),
+            return_type=tool.return_type(),
+            name=tool.name,
+            description=tool.description,
+        )
+        self._tool = tool
+        self._cache = cache
+
+    async def run(self, args, cancellation_token: CancellationToken):
+        arguments = args.model_dump(exclude_unset=True)
+        return await self._cache.call(
+            self.name, arguments, lambda: self._tool.run_json(arguments, cancellation_token)
+        )
+
+    def return_value_as_string(self, value) -> str:
+        return self._tool.return_value_as_string(value)
+
 async def main() -> None:
     samples_dir = "/Users/billhorn/code/python/autogen004/sample_files"
 
@@ -26,9 +58,21 @@ async def main() -> None:
             "/samples_files"
         ]
     )
-    filesystem_tool = await mcp_server_tools(fetch_mcp_server)
+    # Listings and file contents are cached by host path and validated against mtime/size,
+    # which saves the JSON-RPC round trip into the container on repeat reads
+    file_cache = FileToolCache(server_root="/samples_files", host_root=samples_dir)
+    filesystem_tool = [CachedMcpTool(tool, file_cache) for tool in await mcp_server_tools(fetch_mcp_server)]
+
+    task = "List all files in the sample_files directory"
+
+    # Simple list/read/search requests go straight to the MCP tool, skipping the agent handoffs
+    fast_path = FilesystemFastPath(filesystem_tool, root="/samples_files", root_aliases=["sample_files"])
+    fast_answer = await fast_path.try_run(task)
+    if fast_answer is not None:
+        print(fast_answer)
+        return
 
-    model_client = OpenAIChatCompletionClient(
+    model_client = openai_models.OpenAIChatCompletionClient(
         # base_url='http://127.0.0.1:11434/v1', # omit for OpenAI calls
         # NOTE 4.1 nano did not work with the MCP server-filesystem tool
         # gpt-4.1-2025-04-14     = $2.00 / $ 8.00
@@ -48,6 +92,7 @@ async def main() -> None:
         name="assistant_agent",
         model_client=model_client,
         handoffs=["filesystem_tool_expert"],
+        model_context=TokenBudgetChatCompletionContext(token_budget=4000, on_report=report_context_savings),
         system_message="""You are an organization assistant agent.
         The filesystem_tool_expert is responsible for managing file system operations.
         If you need to get information about the file system, you can ask the filesystem_tool_expert,
@@ -60,6 +105,8 @@ async def main() -> None:
         name="filesystem_tool_expert",
         model_client=model_client,
         tools=filesystem_tool,
+        # Directory listings and file contents are the bulk of this agent's prompt
+        model_context=TokenBudgetChatCompletionContext(token_budget=4000, max_tool_output_chars=4000, on_report=report_context_savings),
         system_message="""You are an agent specialized in file system operations.
         You use the filesystem tool to retrieve and. manage files.
         When the transaction is complete, handoff to the assistant_agent to finalize the response.
@@ -73,7 +120,7 @@ async def main() -> None:
 
     last_content = "Incomplete or error response"
     try:
-        result = await team.run(task="List all files in the sample_files directory", cancellation_token=CancellationToken())
+        result = await team.run(task=task, cancellation_token=CancellationToken())
 
         for msg in reversed(result.messages):
             if hasattr(msg, "content"):
@@ -0,0 +1,197 @@
+# mcp_fs_cache.py
+
+import ctypes
+import ctypes.util
+import os
+import posixpath
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Set, Tuple
+
+# Read-only tools whose result, when called with just a path, can be validated by stat()
+CACHED_TOOLS = {"read_file", "read_text_file", "list_directory"}
+# Tools that change the filesystem; they always go to the server and invalidate what they touch
+WRITE_TOOLS = {"write_file", "edit_file", "create_directory", "move_file"}
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    """Minimal inotify reader (Linux only) that reports changed paths to a callback"""
+
+    def __init__(self, on_change: Callable[[str], None]):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+        self._on_change = on_change
+        self._dirs: Dict[int, str] = {}
+        self._watched: Set[str] = set()
+        self._lock = threading.Lock()
+        thread = threading.Thread(target=self._loop, name="mcp-fs-cache-inotify", daemon=True)
+        thread.start()
+
+    def watch(self, directory: str) -> None:
+        with self._lock:
+            if directory in self._watched:
+                return
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                return
+            self._dirs[wd] = directory
+            self._watched.add(directory)
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                with self._lock:
+                    directory = self._dirs.get(wd)
+                    if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF) and directory is not None:
+                        del self._dirs[wd]
+                        self._watched.discard(directory)
+                if directory is None:
+                    continue
+                self._on_change(directory)
+                if name:
+                    self._on_change(os.path.join(directory, name))
+
+
+class FileToolCache:
+    """Memoizes read_file / list_directory results from a filesystem MCP server.
+
+    Entries are keyed by (tool, path) and checked against the file's mtime and
+    size on every hit, so a stale result is never returned. On Linux an inotify
+    watcher also drops entries as soon as the file or directory changes. The
+    cache is an LRU capped at `max_bytes` of result text. Write tools are passed
+    straight through and invalidate the paths they touch.
+
+    `server_root` / `host_root` map paths as the MCP server sees them (e.g. the
+    Docker mount point) to paths on this machine; leave them unset for npx.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        server_root: Optional[str] = None,
+        host_root: Optional[str] = None,
+        use_inotify: bool = True,
+    ):
+        self._max_bytes = max_bytes
+        self._server_root = server_root
+        self._host_root = host_root
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._watcher: Optional[_InotifyWatcher] = None
+        if use_inotify:
+            try:
+                self._watcher = _InotifyWatcher(self.invalidate)
+            except (OSError, AttributeError, TypeError):
+                # No inotify (e.g. macOS); stat() validation alone keeps entries correct
+                self._watcher = None
+
+    def host_path(self, server_path: str) -> str:
+        if self._server_root and self._host_root:
+            relative = posixpath.relpath(posixpath.normpath(server_path), self._server_root)
+            if not relative.startswith(".."):
+                return os.path.normpath(os.path.join(self._host_root, relative))
+        return os.path.normpath(server_path)
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def invalidate(self, host_path: str) -> None:
+        host_path = os.path.normpath(host_path)
+        with self._lock:
+            for tool in CACHED_TOOLS:
+                self._drop((tool, host_path))
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _store(self, key: Tuple[str, str], signature: Tuple[int, int], value: Any, size: int) -> None:
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (signature, value, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    async def call(
+        self,
+        tool_name: str,
+        arguments: Optional[Mapping[str, Any]],
+        call_fn: Callable[[], Awaitable[Any]],
+        size_of: Callable[[Any], int] = lambda value: len(str(value)),
+    ) -> Any:
+        """Return a cached result for `tool_name(arguments)` or run `call_fn` and cache it"""
+        arguments = arguments or {}
+        if tool_name in WRITE_TOOLS:
+            try:
+                return await call_fn()
+            finally:
+                for key in ("path", "source", "destination"):
+                    if key in arguments:
+                        path = self.host_path(arguments[key])
+                        self.invalidate(path)
+                        self.invalidate(os.path.dirname(path))
+
+        path = arguments.get("path")
+        # Entries are keyed by path alone, so e.g. read_text_file(head=5) must not be cached
+        if tool_name not in CACHED_TOOLS or not isinstance(path, str) or len(arguments) > 1:
+            return await call_fn()
+
+        host_path = self.host_path(path)
+        key = (tool_name, host_path)
+        signature = self._signature(host_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and signature is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        self.misses += 1
+
+        value = await call_fn()
+        # Only cache if the file did not change while the server was reading it
+        if signature is not None and self._signature(host_path) == signature:
+            self._store(key, signature, value, size_of(value))
+            if self._watcher is not None:
+                self._watcher.watch(host_path if tool_name == "list_directory" else os.path.dirname(host_path))
+        return value
@@ -3,41 +3,182 @@
 import asyncio
 import os
 import shutil
+import time
+from contextlib import asynccontextmanager
 
-from agents import Agent, Runner, gen_trace_id, trace
+from agents import Agent, Runner, add_trace_processor, custom_span, function_tool, gen_trace_id, trace
 from agents.mcp import MCPServer, MCPServerStdio
 from dotenv import load_dotenv
 
+import metrics
+from file_index import FileSearchIndex
+from mcp_fs_cache import FileToolCache
+from span_collector import MetricsSpanProcessor, install_local_tracing
+
 load_dotenv()
 
-async def run(mcp_server: MCPServer, message: str):
-    agent = Agent(
+# Spans go to a local ring buffer and traces/ instead of platform.openai.com
+span_processor = install_local_tracing()
+add_trace_processor(MetricsSpanProcessor("mcp"))
+
+# Series used on every request, created once
+requests_in_progress = metrics.REQUESTS_IN_PROGRESS.labels("mcp")
+request_total_latency = metrics.REQUEST_LATENCY.labels("mcp", "total")
+mcp_processes = metrics.MCP_PROCESSES.labels("filesystem")
+
+# Shared across requests so repeat questions skip the stdio round trip
+file_cache = FileToolCache()
+
+samples_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_files")
+
+# Built on the first search (in a worker thread) and kept current incrementally:
+# only changed files are re-read
+file_index = FileSearchIndex(samples_dir)
+
+
+# Named so it does not clash with server-filesystem's own search_files (file names only)
+@function_tool
+async def search_file_index(query: str) -> str:
+    """Search the contents of all files in the intranet folder and return the best matching snippets.
+
+    Args:
+        query: What to look for, in plain words.
+    """
+    # The refresh walks the folder and may re-read files; keep it off the event loop
+    return await asyncio.to_thread(file_index.search_text, query)
+
+
+class CachingMCPServer(MCPServer):
+    """Wraps an MCP server and answers repeat read_file / list_directory calls from file_cache"""
+
+    def __init__(self, server: MCPServer, cache: FileToolCache):
+        self._server = server
+        self._cache = cache
+
+    @property
+    def name(self) -> str:
+        return self._server.name
+
+    async def connect(self):
+        await self._server.connect()
+
+    async def cleanup(self):
+        await self._server.cleanup()
+
+    async def list_tools(self, *args, **kwargs):
+        return await self._server.list_tools(*args, **kwargs)
+
+    async def call_tool(self, tool_name, arguments):
+        return await self._cache.call(
+            tool_name,
+            arguments,
+            lambda: self._server.call_tool(tool_name, arguments),
+            size_of=lambda result: sum(len(getattr(c, "text", "")) for c in result.content),
+        )
+
+    async def list_prompts(self, *args, **kwargs):
+        return await self._server.list_prompts(*args, **kwargs)
+
+    async def get_prompt(self, *args, **kwargs):
+        return await self._server.get_prompt(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        # Anything else goes straight to the real server
+        if attr == "_server":
+            raise AttributeError(attr)
+        return getattr(self._server, attr)
+
+
+def build_agent(mcp_server: MCPServer) -> Agent:
+    return Agent(
         name="Assistant",
-        instructions="Use the tools to read the filesystem and answer questions based on those files.",
+        instructions="Use the tools to read the filesystem and answer questions based on those files. "
+                     "Start with search_file_index; only list or read files if its snippets are not enough.",
+        tools=[search_file_index],
         mcp_servers=[mcp_server],
     )
 
-    print(f"\n\nRunning: {message}")
-    result = await Runner.run(starting_agent=agent, input=message)
-    print(result.final_output)
-    return result.final_output
-
-async def run_mcp(message: str):
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    samples_dir = os.path.join(current_dir, "sample_files")
-
+def filesystem_server() -> MCPServerStdio:
     if not shutil.which("npx"):
         raise RuntimeError("npx is not installed. Please install it with `npm install -g npx`.")
 
-    async with MCPServerStdio(
+    return MCPServerStdio(
         name="Filesystem Server, via npx",
         params={
             "command": "npx",
             "args": ["-y", "@modelcontextprotocol/server-filesystem", samples_dir],
             "cache_tools_list": "True",
         },
-    ) as server:
-        trace_id = gen_trace_id()
+    )
+
+async def run(mcp_server: MCPServer, message: str):
+    agent = build_agent(mcp_server)
+
+    print(f"\n\nRunning: {message}")
+    result = await Runner.run(starting_agent=agent, input=message)
+    print(result.final_output)
+    return result.final_output
+
+@asynccontextmanager
+async def mcp_session():
+    """Start the filesystem MCP server inside a trace and yield it wrapped in the file cache"""
+    server = filesystem_server()
+    trace_id = gen_trace_id()
+    requests_in_progress.inc()
+    start = time.perf_counter()
+    try:
         with trace(workflow_name="MCP Filesystem Example", trace_id=trace_id):
-            print(f"View trace: https://platform.openai.com/traces/{trace_id}\n")
-            return await run(server, message)
+            print(f"Trace {trace_id} -> {span_processor.path}\n")
+            with custom_span("mcp_server_spawn"):
+                await server.connect()
+            mcp_processes.inc()
+            try:
+                yield CachingMCPServer(server, file_cache)
+            finally:
+                await server.cleanup()
+                mcp_processes.dec()
+    finally:
+        requests_in_progress.dec()
+        request_total_latency.observe(time.perf_counter() - start)
+
+async def run_mcp(message: str):
+    async with mcp_session() as server:
+        return await run(server, message)
+
+async def run_mcp_stream(message: str, session=None):
+    """Like run_mcp, but yields the answer as it is produced.
+
+    Each yield is the full text so far: tool-call progress lines followed by the
+    model's tokens, so a UI can show it as-is. Closing the generator (e.g. the
+    client disconnected) cancels the agent run. With a session (see
+    session_manager.ConversationSession) the run continues its conversation.
+    """
+    async with mcp_session() as server:
+        run_input = message if session is None else session.items + [{"role": "user", "content": message}]
+        result = Runner.run_streamed(starting_agent=build_agent(server), input=run_input)
+        progress = ""
+        answer = ""
+        try:
+            async for event in result.stream_events():
+                if event.type == "raw_response_event":
+                    delta = getattr(event.data, "delta", None)
+                    if getattr(event.data, "type", "") == "response.output_text.delta" and delta:
+                        answer += delta
+                        yield progress + answer
+                elif event.type == "run_item_stream_event":
+                    item = event.item
+                    if item.type == "tool_call_item":
+                        progress += f"[calling {getattr(item.raw_item, 'name', 'tool')}...]\n"
+                        # Text streamed before a tool call was an intermediate message
+                        if answer:
+                            progress += answer + "\n"
+                            answer = ""
+                        yield progress + answer
+                    elif item.type == "tool_call_output_item":
+                        progress += "[tool finished]\n"
+                        yield progress + answer
+            if session is not None:
+                session.items = result.to_input_list()
+            yield str(result.final_output)
+        finally:
+            result.cancel()
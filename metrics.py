@@ -0,0 +1,197 @@
+# metrics.py
+
+"""Prometheus-format runtime metrics for the Gradio apps.
+
+Recording is meant to be cheap on the hot path: each labelled series is created
+once (keep the object from `.labels(...)` around where you can) and updating it
+is a list-index increment; histograms use fixed buckets. Call
+`start_metrics_server()` to serve everything at http://127.0.0.1:<port>/metrics.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated only when exported
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}" for key, child in list(self._children.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {child.sum}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+REQUEST_LATENCY = Histogram("request_stage_duration_seconds", "Request latency by app and pipeline stage", ("app", "stage"))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by model and direction (in/out)", ("model", "direction"))
+LLM_TOKENS_PER_SECOND = Histogram("llm_output_tokens_per_second", "Output token throughput per LLM call", ("model",), RATE_BUCKETS)
+TOOL_CALLS = Counter("tool_calls_total", "Tool calls by tool name", ("tool",))
+TOOL_CALL_DURATION = Histogram("tool_call_duration_seconds", "Tool call duration by tool name", ("tool",))
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Database query duration", ("db",))
+REQUESTS_IN_PROGRESS = Gauge("requests_in_progress", "Requests currently being handled (admitted from the Gradio queue)", ("app",))
+MCP_PROCESSES = Gauge("mcp_server_processes", "MCP server processes currently running", ("server",))
+
+
+def record_llm_call(model: str, input_tokens: int, output_tokens: int, seconds: float) -> None:
+    LLM_TOKENS.labels(model, "in").inc(input_tokens)
+    LLM_TOKENS.labels(model, "out").inc(output_tokens)
+    if seconds > 0 and output_tokens:
+        LLM_TOKENS_PER_SECOND.labels(model).observe(output_tokens / seconds)
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(
+    port: int = None, host: str = "127.0.0.1", env_var: str = "METRICS_PORT", default_port: int = 9464
+) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a background thread (once per process).
+
+    The port defaults to the `env_var` environment variable, then `default_port`;
+    give each app its own so several can run on one host. If the port cannot be
+    bound a warning is printed and None returned, so the app itself still starts.
+    """
+    global _server
+    if _server is None:
+        port = port or int(os.getenv(env_var, str(default_port)))
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"Warning: metrics server not started, could not bind {host}:{port} ({e}); set {env_var} to a free port")
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"Metrics at http://{host}:{port}/metrics")
+    return _server
@@ -0,0 +1,272 @@
+# model_router.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, List, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    LLMMessage,
+    ModelCapabilities,
+    ModelInfo,
+    RequestUsage,
+    UserMessage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+
+class Backend:
+    """A model client the router can send requests to, plus its live latency stats"""
+
+    def __init__(self, name: str, client: ChatCompletionClient, window: int = 100):
+        self.name = name
+        self.client = client
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.errors = 0
+        self.hedge_losses = 0
+        self.last_error: Optional[float] = None
+
+    def supports(self, needs_tools: bool, needs_vision: bool) -> bool:
+        info = self.client.model_info
+        if needs_tools and not info["function_calling"]:
+            return False
+        if needs_vision and not info["vision"]:
+            return False
+        return True
+
+    def record(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def record_error(self) -> None:
+        self.errors += 1
+        self.last_error = time.monotonic()
+
+    def cooling_down(self, cooldown: float) -> bool:
+        return self.last_error is not None and time.monotonic() - self.last_error < cooldown
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+
+class RouterChatCompletionClient(ChatCompletionClient):
+    """Routes each request to the best backend for its capabilities and latency SLO.
+
+    Backends that cannot serve the request (tools without function calling,
+    images without vision) are skipped. The rest are ordered: backends known to
+    meet the p95 SLO (fastest p50 first), then backends without stats yet (in
+    declared order), then those missing the SLO, then those that failed within
+    the last `error_cooldown` seconds. If the chosen backend has not answered
+    after `hedge_delay` seconds, the same request is sent to the next backend
+    and the first answer wins. Errors fall through to the next backend.
+
+    Losing a hedge and failing both count against a backend's stats: the loser
+    is recorded as at least `hedge_delay`, a failure as an SLO-violating time.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        latency_slo: Optional[float] = None,
+        hedge_delay: Optional[float] = 2.0,
+        error_cooldown: float = 30.0,
+    ):
+        if not backends:
+            raise ValueError("RouterChatCompletionClient needs at least one backend.")
+        self._backends = list(backends)
+        self._latency_slo = latency_slo
+        self._hedge_delay = hedge_delay
+        self._error_cooldown = error_cooldown
+        # Recorded for a failed call so the backend ranks as too slow
+        self._error_penalty = max(hedge_delay or 0.0, 2 * latency_slo if latency_slo else 0.0)
+
+    @property
+    def backends(self) -> List[Backend]:
+        return self._backends
+
+    def _candidates(self, messages: Sequence[LLMMessage], tools: Sequence[Tool | ToolSchema]) -> List[Backend]:
+        needs_tools = len(tools) > 0
+        needs_vision = any(
+            isinstance(m, UserMessage) and not isinstance(m.content, str) and any(not isinstance(c, str) for c in m.content)
+            for m in messages
+        )
+        candidates = [b for b in self._backends if b.supports(needs_tools, needs_vision)]
+        if not candidates:
+            raise ValueError("No backend supports the capabilities this request needs.")
+
+        def rank(item):
+            position, backend = item
+            if backend.cooling_down(self._error_cooldown):
+                return (3, backend.last_error, position)
+            p50, p95 = backend.p50, backend.p95
+            if p50 is None:
+                # No stats yet, keep the declared order
+                return (1, 0.0, position)
+            meets_slo = self._latency_slo is None or p95 <= self._latency_slo
+            return (0 if meets_slo else 2, p50, position)
+
+        return [b for _, b in sorted(enumerate(candidates), key=rank)]
+
+    async def _call(self, backend: Backend, messages, tools, json_output, extra_create_args) -> CreateResult:
+        start = time.perf_counter()
+        try:
+            result = await backend.client.create(
+                messages, tools=tools, json_output=json_output, extra_create_args=extra_create_args
+            )
+        except Exception:
+            backend.record_error()
+            backend.record(max(time.perf_counter() - start, self._error_penalty))
+            raise
+        backend.record(time.perf_counter() - start)
+        return result
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        queue = self._candidates(messages, tools)
+        pending: set[asyncio.Task] = set()
+        started: dict[asyncio.Task, tuple[Backend, float]] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            backend = queue.pop(0)
+            task = asyncio.ensure_future(self._call(backend, messages, tools, json_output, extra_create_args))
+            if cancellation_token is not None:
+                cancellation_token.link_future(task)
+            pending.add(task)
+            started[task] = (backend, time.perf_counter())
+
+        launch()
+        try:
+            while pending:
+                hedge = self._hedge_delay if queue and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slow, hedge on the next backend
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    if task.cancelled():
+                        raise asyncio.CancelledError()
+                    if task.exception() is None:
+                        # The calls still running lost the hedge: they were at least this slow.
+                        # A cancellation by the caller is not held against any backend.
+                        for loser in pending:
+                            backend, start = started[loser]
+                            backend.hedge_losses += 1
+                            backend.record(max(time.perf_counter() - start, self._hedge_delay or 0.0))
+                        return task.result()
+                    last_error = task.exception()
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise RuntimeError("All model backends failed.") from last_error
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # Streams are not hedged; fall back to the next backend only if nothing was yielded yet
+        last_error: Optional[BaseException] = None
+        for backend in self._candidates(messages, tools):
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in backend.client.create_stream(
+                    messages,
+                    tools=tools,
+                    json_output=json_output,
+                    extra_create_args=extra_create_args,
+                    cancellation_token=cancellation_token,
+                ):
+                    started = True
+                    yield chunk
+                backend.record(time.perf_counter() - start)
+                return
+            except Exception as e:
+                backend.record_error()
+                backend.record(max(time.perf_counter() - start, self._error_penalty))
+                if started:
+                    raise
+                last_error = e
+        raise RuntimeError("All model backends failed.") from last_error
+
+    async def close(self) -> None:
+        for backend in self._backends:
+            await backend.client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._sum_usage([b.client.actual_usage() for b in self._backends])
+
+    def total_usage(self) -> RequestUsage:
+        return self._sum_usage([b.client.total_usage() for b in self._backends])
+
+    @staticmethod
+    def _sum_usage(usages: Sequence[RequestUsage]) -> RequestUsage:
+        return RequestUsage(
+            prompt_tokens=sum(u.prompt_tokens for u in usages),
+            completion_tokens=sum(u.completion_tokens for u in usages),
+        )
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._backends[0].client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return min(b.client.remaining_tokens(messages, tools=tools) for b in self._backends)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self.model_info  # type: ignore
+
+    @property
+    def model_info(self) -> ModelInfo:
+        # Advertise what at least one backend can do; per-request routing enforces it
+        infos = [b.client.model_info for b in self._backends]
+        first = infos[0]
+        return ModelInfo(
+            vision=any(i["vision"] for i in infos),
+            function_calling=any(i["function_calling"] for i in infos),
+            json_output=any(i["json_output"] for i in infos),
+            family=first["family"],
+        )
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "name": b.name,
+                "p50": b.p50,
+                "p95": b.p95,
+                "calls": len(b.latencies),
+                "errors": b.errors,
+                "hedge_losses": b.hedge_losses,
+            }
+            for b in self._backends
+        ]
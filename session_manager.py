@@ -0,0 +1,226 @@
+# session_manager.py
+
+"""Per-session agent/team state that survives between requests.
+
+SessionManager keeps live session objects (an autogen team or agent, or a
+ConversationSession for the Agents SDK) in an LRU memory tier. Anything with
+async save_state()/load_state() works. Sessions pushed out of memory are
+spilled to disk as zlib-compressed JSON and restored on their next request.
+Long histories are trimmed to a per-session byte cap, and sessions idle longer
+than `idle_ttl` are dropped from memory and disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_SESSION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions")
+
+# Lists of history that can be trimmed from the front
+_HISTORY_KEYS = ("messages", "message_thread", "items")
+# A tool result is useless to the model without the call before it
+_ORPHAN_TYPES = ("FunctionExecutionResultMessage", "ToolCallExecutionEvent", "function_call_output")
+
+
+def compact_state(state: Any, keep: int) -> Any:
+    """Keep only the last `keep` entries of every history list in a saved state"""
+    if isinstance(state, dict):
+        compacted = {}
+        for key, value in state.items():
+            if key in _HISTORY_KEYS and isinstance(value, list) and len(value) > keep:
+                value = value[-keep:] if keep else []
+                while value and isinstance(value[0], dict) and value[0].get("type") in _ORPHAN_TYPES:
+                    value = value[1:]
+                compacted[key] = value
+            else:
+                compacted[key] = compact_state(value, keep)
+        return compacted
+    if isinstance(state, list):
+        return [compact_state(item, keep) for item in state]
+    return state
+
+
+class ConversationSession:
+    """Conversation history for the OpenAI Agents SDK (the items from result.to_input_list())"""
+
+    def __init__(self):
+        self.items = []
+
+    async def save_state(self) -> Dict[str, Any]:
+        return {"items": self.items}
+
+    async def load_state(self, state: Dict[str, Any]) -> None:
+        self.items = list(state.get("items", []))
+
+
+class _Entry:
+    __slots__ = ("obj", "lock", "last_used", "pins")
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        # Requests holding or waiting for this entry; pinned entries are never evicted
+        self.pins = 0
+
+
+class SessionManager:
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        directory: str = DEFAULT_SESSION_DIR,
+        max_live: int = 64,
+        idle_ttl: float = 3600,
+        max_state_bytes: int = 256 * 1024,
+        keep_messages: int = 40,
+    ):
+        self._factory = factory
+        self._directory = directory
+        self._max_live = max_live
+        self._idle_ttl = idle_ttl
+        self._max_state_bytes = max_state_bytes
+        self._keep_messages = keep_messages
+        self._live: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._spilling: Dict[str, asyncio.Future] = {}
+        self._last_sweep = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self._directory, hashlib.sha1(session_id.encode()).hexdigest() + ".state")
+
+    def _write(self, session_id: str, state: Dict[str, Any]) -> None:
+        data = zlib.compress(json.dumps(state, separators=(",", ":"), default=str).encode(), 6)
+        tmp = self._path(session_id) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(session_id))
+
+    def _read(self, session_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(session_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self._idle_ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    async def _compacted_state(self, obj) -> Dict[str, Any]:
+        state = await obj.save_state()
+        size = len(json.dumps(state, default=str))
+        keep = self._keep_messages
+        while size > self._max_state_bytes and keep > 1:
+            state = compact_state(state, keep)
+            size = len(json.dumps(state, default=str))
+            keep //= 2
+        return state
+
+    async def _spill(self, session_id: str, entry: _Entry) -> None:
+        done = asyncio.get_running_loop().create_future()
+        self._spilling[session_id] = done
+        try:
+            async with entry.lock:
+                state = await self._compacted_state(entry.obj)
+            await asyncio.to_thread(self._write, session_id, state)
+        finally:
+            del self._spilling[session_id]
+            done.set_result(None)
+
+    async def _sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < min(60.0, self._idle_ttl):
+            return
+        self._last_sweep = now
+        for session_id, entry in list(self._live.items()):
+            if now - entry.last_used > self._idle_ttl and not entry.pins:
+                del self._live[session_id]
+        await asyncio.to_thread(self._remove_expired, time.time() - self._idle_ttl)
+
+    def _remove_expired(self, cutoff: float) -> None:
+        for name in os.listdir(self._directory):
+            path = os.path.join(self._directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    async def _get(self, session_id: str) -> _Entry:
+        """Return the pinned live entry for `session_id`, loading it from disk if needed"""
+        await self._sweep()
+        while session_id in self._spilling:
+            # Being written out right now; read it back once the write is done
+            await self._spilling[session_id]
+        entry = self._live.get(session_id)
+        if entry is not None:
+            entry.pins += 1
+            self._live.move_to_end(session_id)
+            entry.last_used = time.monotonic()
+            return entry
+
+        # Registered before the disk read so concurrent requests for this session
+        # share the entry, and wait on its lock until the state is loaded
+        entry = _Entry(self._factory())
+        entry.pins += 1
+        self._live[session_id] = entry
+        async with entry.lock:
+            try:
+                state = await asyncio.to_thread(self._read, session_id)
+                if state is not None:
+                    await entry.obj.load_state(state)
+            except BaseException:
+                if self._live.get(session_id) is entry:
+                    del self._live[session_id]
+                raise
+        return entry
+
+    async def _evict(self) -> None:
+        """Spill the least recently used sessions that no request is using"""
+        for evicted_id in list(self._live):
+            if len(self._live) <= self._max_live:
+                break
+            evicted = self._live.get(evicted_id)
+            if evicted is None or evicted.pins:
+                continue
+            del self._live[evicted_id]
+            try:
+                await self._spill(evicted_id, evicted)
+            except OSError as e:
+                # e.g. a full disk: keep the session in memory rather than lose it
+                print(f"Could not spill session to {self._directory}: {e}")
+                if evicted_id not in self._live:
+                    self._live[evicted_id] = evicted
+                    self._live.move_to_end(evicted_id, last=False)
+                break
+
+    @asynccontextmanager
+    async def session(self, session_id: str):
+        """Yield the session's live object; one request at a time per session.
+
+        On exit the state is trimmed back into the object if it grew past
+        `max_state_bytes`, so memory per session stays bounded.
+        """
+        entry = await self._get(session_id)
+        try:
+            await self._evict()
+            async with entry.lock:
+                yield entry.obj
+                state = await entry.obj.save_state()
+                if len(json.dumps(state, default=str)) > self._max_state_bytes:
+                    await entry.obj.load_state(await self._compacted_state(entry.obj))
+                entry.last_used = time.monotonic()
+        finally:
+            entry.pins -= 1
+
+    async def close(self) -> None:
+        """Spill every live session to disk (e.g. on shutdown)"""
+        while self._live:
+            session_id, entry = self._live.popitem(last=False)
+            await self._spill(session_id, entry)
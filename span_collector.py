@@ -0,0 +1,363 @@
+# span_collector.py
+
+"""In-process span collector for the OpenAI Agents SDK.
+
+LocalSpanProcessor replaces the hosted trace exporter: finished spans are written
+into a fixed-size ring buffer on the hot path (one tuple, no locks) and a
+background thread flushes them in batches to local JSONL or OTLP-JSON files.
+
+Run it as a script to summarize a file:
+
+    python span_collector.py traces/spans.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from agents import set_trace_processors
+from agents.tracing.processor_interface import TracingProcessor
+
+import metrics
+
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+
+
+def _span_name(span) -> str:
+    data = span.span_data
+    for attr in ("name", "server", "model"):
+        value = getattr(data, attr, None)
+        if value:
+            return str(value)
+    return data.type
+
+
+def _to_ns(timestamp: Optional[str]) -> int:
+    if not timestamp:
+        return 0
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000_000)
+
+
+class LocalSpanProcessor(TracingProcessor):
+    """Collects spans into a ring buffer and flushes them to local files.
+
+    - `sample_rate` is decided once per trace (head sampling); spans of unsampled
+      traces are dropped at no cost.
+    - The ring buffer holds `capacity` spans. If the flusher falls a full buffer
+      behind, the oldest spans are overwritten and counted in `dropped`.
+    - Any number of threads may record spans: each slot carries the sequence number
+      it was written for, and the flusher stops at the first slot not written yet.
+    - `fmt` is "jsonl" (one span per line) or "otlp" (one OTLP/JSON export request
+      per flushed batch).
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_TRACE_DIR,
+        fmt: str = "jsonl",
+        sample_rate: float = 1.0,
+        capacity: int = 4096,
+        flush_interval: float = 1.0,
+        service_name: str = "autogen04-experiments",
+    ):
+        if fmt not in ("jsonl", "otlp"):
+            raise ValueError("fmt must be 'jsonl' or 'otlp'")
+        self._directory = directory
+        self._fmt = fmt
+        self._sample_rate = sample_rate
+        self._capacity = capacity
+        # (sequence number, record) per slot
+        self._buffer: List[Optional[tuple]] = [None] * capacity
+        # itertools.count is atomic under the GIL, so writers never need a lock
+        self._sequence = itertools.count()
+        self._flushed = 0
+        self._flush_lock = threading.Lock()
+        self._flush_interval = flush_interval
+        self._service_name = service_name
+        self._sampled: Dict[str, int] = {}
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-flusher", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._directory, f"spans.{'otlp.json' if self._fmt == 'otlp' else 'jsonl'}")
+
+    def _record(self, record: tuple) -> None:
+        seq = next(self._sequence)
+        # A single list store, so the flusher sees either the old slot or this one
+        self._buffer[seq % self._capacity] = (seq, record)
+
+    def on_trace_start(self, trace) -> None:
+        if self._sample_rate >= 1.0 or random.random() < self._sample_rate:
+            self._sampled[trace.trace_id] = time.time_ns()
+
+    def on_trace_end(self, trace) -> None:
+        started = self._sampled.pop(trace.trace_id, None)
+        if started is not None:
+            self._record((trace.trace_id, trace.trace_id, None, "trace", trace.name, started, time.time_ns(), None))
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def on_span_end(self, span) -> None:
+        if span.trace_id not in self._sampled:
+            return
+        # Timestamps stay as ISO strings here; the flusher converts them off the hot path
+        self._record((
+            span.trace_id, span.span_id, span.parent_id, span.span_data.type, _span_name(span),
+            span.started_at, span.ended_at, span.error,
+        ))
+
+    def _drain(self) -> List[tuple]:
+        batch = []
+        seq = self._flushed
+        while True:
+            slot = self._buffer[seq % self._capacity]
+            if slot is None or slot[0] < seq:
+                # Claimed but not written yet (or never claimed); pick it up next flush
+                break
+            if slot[0] > seq:
+                # Overwritten by a writer a full buffer ahead
+                self.dropped += 1
+            else:
+                batch.append(slot[1])
+            seq += 1
+        self._flushed = seq
+        return batch
+
+    def force_flush(self) -> None:
+        with self._flush_lock:
+            batch = self._drain()
+            if not batch:
+                return
+            spans = []
+            for trace_id, span_id, parent_id, kind, name, start, end, error in batch:
+                spans.append({
+                    "trace_id": trace_id,
+                    "span_id": span_id,
+                    "parent_id": parent_id,
+                    "type": kind,
+                    "name": name,
+                    "start_ns": start if isinstance(start, int) else _to_ns(start),
+                    "end_ns": end if isinstance(end, int) else _to_ns(end),
+                    "error": error,
+                })
+            os.makedirs(self._directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._fmt == "jsonl":
+                    f.writelines(json.dumps(s) + "\n" for s in spans)
+                else:
+                    f.write(json.dumps(self._otlp(spans)) + "\n")
+
+    def _otlp(self, spans: List[dict]) -> dict:
+        def span_id(value: str) -> str:
+            # OTLP span ids are 16 hex chars; the trace record uses its trace id, cut the same way
+            return value.removeprefix("span_").removeprefix("trace_")[:16]
+
+        def parent_id(s: dict) -> str:
+            if s["parent_id"]:
+                return span_id(s["parent_id"])
+            # Top-level spans nest under their trace record, as in the jsonl output
+            return "" if s["type"] == "trace" else span_id(s["trace_id"])
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self._service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "span_collector"},
+                    "spans": [
+                        {
+                            "traceId": s["trace_id"].removeprefix("trace_"),
+                            "spanId": span_id(s["span_id"]),
+                            "parentSpanId": parent_id(s),
+                            "name": s["name"],
+                            "startTimeUnixNano": str(s["start_ns"]),
+                            "endTimeUnixNano": str(s["end_ns"]),
+                            "attributes": [{"key": "span.type", "value": {"stringValue": s["type"]}}],
+                            "status": {"code": 2 if s["error"] else 1},
+                        }
+                        for s in spans
+                    ],
+                }],
+            }]
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._flush_interval):
+            try:
+                self.force_flush()
+            except Exception as e:
+                print(f"Span flush failed: {e}")
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self._flush_interval + 1)
+        self.force_flush()
+
+
+class MetricsSpanProcessor(TracingProcessor):
+    """Feeds span timings and token usage into the Prometheus metrics in metrics.py.
+
+    Unlike LocalSpanProcessor this sees every span (no sampling), since updating
+    a counter or histogram costs about as much as deciding to skip it.
+    """
+
+    _STAGES = {"mcp_tools": "list_tools", "response": "llm", "generation": "llm", "function": "tool", "agent": "agent"}
+
+    def __init__(self, app: str):
+        self._app = app
+
+    def on_trace_start(self, trace) -> None:
+        pass
+
+    def on_trace_end(self, trace) -> None:
+        pass
+
+    def on_span_start(self, span) -> None:
+        pass
+
+    def on_span_end(self, span) -> None:
+        data = span.span_data
+        stage = self._STAGES.get(data.type) or getattr(data, "name", None) or data.type
+        seconds = (_to_ns(span.ended_at) - _to_ns(span.started_at)) / 1e9
+        metrics.REQUEST_LATENCY.labels(self._app, stage).observe(seconds)
+        if data.type == "function":
+            metrics.TOOL_CALLS.labels(data.name).inc()
+            metrics.TOOL_CALL_DURATION.labels(data.name).observe(seconds)
+        elif data.type == "response" and getattr(data, "response", None) is not None:
+            usage = data.response.usage
+            if usage is not None:
+                metrics.record_llm_call(data.response.model, usage.input_tokens, usage.output_tokens, seconds)
+        elif data.type == "generation" and data.usage:
+            metrics.record_llm_call(
+                data.model or "unknown", data.usage.get("input_tokens", 0), data.usage.get("output_tokens", 0), seconds
+            )
+
+    def force_flush(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+_installed: Optional[LocalSpanProcessor] = None
+
+
+def install_local_tracing() -> LocalSpanProcessor:
+    """Replace the hosted trace exporter with a LocalSpanProcessor (once per process).
+
+    Configured with TRACE_DIR, TRACE_FORMAT (jsonl/otlp) and TRACE_SAMPLE_RATE.
+    """
+    global _installed
+    if _installed is None:
+        _installed = LocalSpanProcessor(
+            directory=os.getenv("TRACE_DIR", DEFAULT_TRACE_DIR),
+            fmt=os.getenv("TRACE_FORMAT", "jsonl"),
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+        )
+        set_trace_processors([_installed])
+    return _installed
+
+
+def load_spans(path: str) -> List[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "resourceSpans" not in record:
+                spans.append(record)
+                continue
+            for resource in record["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    for s in scope["spans"]:
+                        spans.append({
+                            "trace_id": s["traceId"],
+                            "span_id": s["spanId"],
+                            "parent_id": s["parentSpanId"] or None,
+                            "type": s["attributes"][0]["value"]["stringValue"],
+                            "name": s["name"],
+                            "start_ns": int(s["startTimeUnixNano"]),
+                            "end_ns": int(s["endTimeUnixNano"]),
+                        })
+    return spans
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def stage_breakdown(spans: List[dict]) -> str:
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for s in spans:
+        stages[f"{s['type']}:{s['name']}"].append((s["end_ns"] - s["start_ns"]) / 1e6)
+    lines = [f"{'stage':<50} {'count':>6} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for stage, durations in sorted(stages.items(), key=lambda item: sum(item[1]), reverse=True):
+        lines.append(
+            f"{stage[:50]:<50} {len(durations):>6} {sum(durations):>10.1f} "
+            f"{_percentile(durations, 50):>9.1f} {_percentile(durations, 95):>9.1f} {max(durations):>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def flame_summary(spans: List[dict], width: int = 40) -> str:
+    """Self time aggregated by call path (root;child;...), like a collapsed flame graph"""
+    by_id = {(s["trace_id"], s["span_id"]): s for s in spans}
+    children_time: Dict[tuple, int] = defaultdict(int)
+    for s in spans:
+        parent = s["parent_id"] or (s["trace_id"] if s["type"] != "trace" else None)
+        if parent is not None:
+            children_time[(s["trace_id"], parent)] += s["end_ns"] - s["start_ns"]
+
+    def stack(s: dict) -> str:
+        names = []
+        while s is not None:
+            names.append(f"{s['type']}:{s['name']}")
+            parent = s["parent_id"] or (s["trace_id"] if s["type"] != "trace" else None)
+            s = by_id.get((s["trace_id"], parent)) if parent is not None else None
+        return ";".join(reversed(names))
+
+    self_time: Dict[str, float] = defaultdict(float)
+    for key, s in by_id.items():
+        own = s["end_ns"] - s["start_ns"] - children_time.get(key, 0)
+        self_time[stack(s)] += max(own, 0) / 1e6
+    total = sum(self_time.values()) or 1.0
+    lines = []
+    for path, ms in sorted(self_time.items(), key=lambda item: item[1], reverse=True):
+        bar = "#" * max(1, int(width * ms / total))
+        lines.append(f"{ms:>10.1f} ms {bar:<{width}} {path}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize spans written by LocalSpanProcessor")
+    parser.add_argument("path", nargs="?", default=os.path.join(DEFAULT_TRACE_DIR, "spans.jsonl"))
+    parser.add_argument("--flame", action="store_true", help="also print self time by call path")
+    args = parser.parse_args(argv)
+
+    spans = load_spans(args.path)
+    if not spans:
+        print(f"No spans in {args.path}")
+        return
+    traces = len({s["trace_id"] for s in spans})
+    print(f"{len(spans)} spans from {traces} traces\n")
+    print(stage_breakdown(spans))
+    if args.flame:
+        print()
+        print(flame_summary(spans))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
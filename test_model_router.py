@@ -0,0 +1,233 @@
+# test_model_router.py
+
+"""RouterChatCompletionClient against small local OpenAI-compatible servers.
+
+Each server answers POST /v1/chat/completions with its own name as the
+message content, optionally after a delay or with an HTTP 500.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("autogen_ext.models.openai")
+
+from autogen_core import CancellationToken
+from autogen_core.models import ModelInfo, UserMessage
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+from model_router import Backend, RouterChatCompletionClient
+
+MESSAGES = [UserMessage(content="What time is it?", source="user")]
+ADD_TOOL = {
+    "name": "add",
+    "description": "Add two numbers",
+    "parameters": {"type": "object", "properties": {"a": {"type": "number"}, "b": {"type": "number"}}},
+}
+
+
+class MockServer:
+    """An OpenAI-compatible chat completions endpoint on 127.0.0.1"""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests += 1
+                time.sleep(delay)
+                if fail:
+                    body = {"error": {"message": "backend down", "type": "server_error"}}
+                    status = 500
+                else:
+                    body = {
+                        "id": "chatcmpl-mock",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": name,
+                        "choices": [
+                            {"index": 0, "message": {"role": "assistant", "content": name}, "finish_reason": "stop"}
+                        ],
+                        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+                    }
+                    status = 200
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    # The router cancelled this request and the client hung up
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def backend(self, function_calling: bool = True) -> Backend:
+        client = OpenAIChatCompletionClient(
+            model=self.name,
+            base_url=self.base_url,
+            api_key="test",
+            max_retries=0,
+            model_info=ModelInfo(vision=False, function_calling=function_calling, json_output=False, family="unknown"),
+        )
+        return Backend(self.name, client)
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(name, **kwargs):
+        server = MockServer(name, **kwargs)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.close()
+
+
+def track_cancellation(backend: Backend) -> list:
+    """Record in the returned list when a call to this backend is cancelled"""
+    cancelled = []
+    create = backend.client.create
+
+    async def wrapped(*args, **kwargs):
+        try:
+            return await create(*args, **kwargs)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    backend.client.create = wrapped
+    return cancelled
+
+
+def test_hedge_goes_to_second_backend_and_wins(servers):
+    slow = servers("slow", delay=2.0).backend()
+    fast = servers("fast").backend()
+    router = RouterChatCompletionClient([slow, fast], hedge_delay=0.2)
+
+    async def run():
+        start = time.perf_counter()
+        result = await router.create(MESSAGES)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+
+    assert result.content == "fast"
+    assert elapsed < 1.5
+    assert fast.p50 is not None
+
+
+def test_hedge_loser_is_cancelled_and_ranked_down(servers):
+    slow = servers("slow", delay=2.0).backend()
+    fast = servers("fast").backend()
+    cancelled = track_cancellation(slow)
+    router = RouterChatCompletionClient([slow, fast], hedge_delay=0.2)
+
+    async def run():
+        first = await router.create(MESSAGES)
+        # Give the cancelled task a moment to unwind
+        await asyncio.sleep(0.05)
+        return first
+
+    assert asyncio.run(run()).content == "fast"
+    assert cancelled == [True]
+    assert slow.hedge_losses == 1
+    assert slow.p50 >= 0.2
+    # The loser now has stats and ranks after the backend that won
+    assert router._candidates(MESSAGES, []) == [fast, slow]
+
+
+def test_caller_cancellation_is_not_a_hedge_loss(servers):
+    first = servers("first", delay=2.0).backend()
+    second = servers("second", delay=2.0).backend()
+    router = RouterChatCompletionClient([first, second], hedge_delay=0.1)
+
+    async def run():
+        token = CancellationToken()
+        call = asyncio.ensure_future(router.create(MESSAGES, cancellation_token=token))
+        # Both backends are in flight when the caller gives up
+        await asyncio.sleep(0.3)
+        token.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(run())
+
+    assert first.hedge_losses == 0
+    assert second.hedge_losses == 0
+    assert first.p50 is None
+    assert second.p50 is None
+
+
+def test_falls_back_on_error(servers):
+    failing_server = servers("failing", fail=True)
+    failing = failing_server.backend()
+    fast = servers("fast").backend()
+    router = RouterChatCompletionClient([failing, fast], hedge_delay=None)
+
+    async def run():
+        first = await router.create(MESSAGES)
+        # In cooldown after the failure, so the next request skips it
+        assert router._candidates(MESSAGES, []) == [fast, failing]
+        second = await router.create(MESSAGES)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.content == "fast"
+    assert second.content == "fast"
+    assert failing_server.requests == 1
+    assert failing.errors == 1
+
+
+def test_all_backends_failing_raises(servers):
+    router = RouterChatCompletionClient(
+        [servers("a", fail=True).backend(), servers("b", fail=True).backend()], hedge_delay=None
+    )
+    with pytest.raises(RuntimeError, match="All model backends failed"):
+        asyncio.run(router.create(MESSAGES))
+
+
+def test_tools_only_go_to_function_calling_backends(servers):
+    text_only = servers("text-only").backend(function_calling=False)
+    tools = servers("tools").backend(function_calling=True)
+    router = RouterChatCompletionClient([text_only, tools], hedge_delay=None)
+
+    async def run():
+        return await router.create(MESSAGES), await router.create(MESSAGES, tools=[ADD_TOOL])
+
+    plain, with_tools = asyncio.run(run())
+
+    assert plain.content == "text-only"
+    assert with_tools.content == "tools"
+
+
+def test_no_capable_backend_raises(servers):
+    router = RouterChatCompletionClient([servers("text-only").backend(function_calling=False)])
+    with pytest.raises(ValueError, match="No backend supports"):
+        asyncio.run(router.create(MESSAGES, tools=[ADD_TOOL]))
@@ -3,11 +3,9 @@ import os
 from autogen_agentchat.agents import AssistantAgent, UserProxyAgent
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.ui import Console
-from autogen_core.models import ModelFamily, ModelInfo
+from autogen_core.models import ModelFamily
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_ext.agents.web_surfer import MultimodalWebSurfer
-from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -40,5 +38,5 @@ async def main() -> None:
             print(message.content)
             print("--End message--")
 
-asyncio.run(main())
-
+if __name__ == "__main__":
+    asyncio.run(main())